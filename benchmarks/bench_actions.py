@@ -0,0 +1,261 @@
+"""Run the scraper headless, the way Kodi scans a library: find, getdetails, getepisodelist and
+getepisodedetails for every episode of every show. Report the latency of each action, how
+often lookups hit the database and the response cache, and the bytes written to the profile.
+
+The Kodi modules are replaced by the stand-ins in kodi_shim.py and the library is a synthetic
+tree of empty files built from the filename corpus. AniList is replaced by the stub server,
+which replays a cassette or, without one, makes up an anime for every query.
+The first pass starts from an empty profile, the later ones reuse it.
+Run with `python benchmarks/bench_actions.py [--shows 20] [--episodes 12] [--passes 2]
+[--cassette FILE] [--latency 0.05] [--jitter 0.02] [--rate-limit 0] [--error-rate 0]`."""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import traceback
+import runpy
+import argparse
+import tempfile
+import threading
+import urllib.parse
+
+from bench_parse_many import build_folders
+from common import ROOT, load_corpus
+from kodi_shim import ADDON_ID, Kodi
+from stub_server import StubServer
+
+import anitopy
+
+sys.path.insert(0, os.path.join(ROOT, ADDON_ID))
+import cassette  # noqa: E402
+import queries  # noqa: E402
+
+MAIN = os.path.join(ROOT, ADDON_ID, 'main.py')
+PLUGIN_URL = f'plugin://{ADDON_ID}/'
+
+FRAGMENT_PATTERN = re.compile(r'fragment (\w+) on Media')
+# Log messages of main.py counted per action
+COUNTED_MESSAGES = {
+    'database hits': re.compile(r'Found anime in database'),
+    'database misses': re.compile(r'Fetching .* from AniList API'),
+    'response cache hits': re.compile(r'Using cached AniList response|using an expired cached response'),
+}
+
+
+def top_level_fields(fragment):
+    fields = []
+    depth = 0
+    for token in re.findall(r'\w+|[{}]', fragment):
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        elif depth == 0:
+            fields.append(token)
+    return fields
+
+
+def make_anime(anime_id, title, episodes):
+    """Return a made-up anime with all the fields of queries.FRAGMENTS"""
+    image = f'https://example.com/{anime_id}'
+    return {
+        'id': anime_id,
+        'idMal': anime_id,
+        'title': {'english': title, 'romaji': title},
+        'description': f'{title} is a made up anime. ' * 20,
+        'coverImage': {'extraLarge': image + '/large.jpg', 'medium': image + '/medium.jpg'},
+        'averageScore': 70,
+        'meanScore': 72,
+        'popularity': 1000,
+        'episodes': episodes,
+        'trailer': None,
+        'genres': ['Action', 'Comedy'],
+        'studios': {'nodes': [{'name': 'Studio'}]},
+        'startDate': {'year': 2020, 'month': 1, 'day': 1},
+        'status': 'FINISHED',
+        'bannerImage': image + '/banner.jpg',
+        'duration': 24,
+    }
+
+
+class SyntheticAniList(StubServer):
+    """Answers every search and lookup by id with a made-up anime"""
+
+    def __init__(self, address, episodes, **kwargs):
+        super().__init__(address, {}, **kwargs)
+        self.episodes = episodes
+        self.titles = {}
+
+    def respond(self, query, variables):
+        if 'search' in variables:
+            title = variables['search']
+            anime_id = zlib.crc32(title.encode('utf-8')) % 1000000
+            with self.lock:
+                self.titles[anime_id] = title
+        else:
+            anime_id = variables['id']
+            # Ids it did not make up come from a copied profile, see replay_trace.py
+            title = self.titles.get(anime_id, f'Anime {anime_id}')
+        anime = make_anime(anime_id, title, self.episodes)
+        fields = [field for name in FRAGMENT_PATTERN.findall(query)
+                  for field in top_level_fields(queries.FRAGMENTS[name])]
+        return 200, json.dumps({'data': {'Media': {field: anime[field] for field in fields}}})
+
+
+def build_library(root, shows, episodes):
+    """Write a library of `shows` folders of `episodes` empty files, and a sources.xml with it
+    as the only video source. Return the folder names."""
+    library = os.path.join(root, 'library')
+    names = []
+    for folder in build_folders(load_corpus(), episodes):
+        title = anitopy.parse(folder[0]).title
+        if not title or title in names or '/' in title:
+            continue
+        os.makedirs(os.path.join(library, title))
+        for filename in folder:
+            open(os.path.join(library, title, filename), 'w').close()
+        names.append(title)
+        if len(names) == shows:
+            break
+
+    userdata = os.path.join(root, 'userdata')
+    os.makedirs(userdata)
+    with open(os.path.join(userdata, 'sources.xml'), 'w', encoding='utf-8') as fs:
+        fs.write(f'<sources><video><source><name>Anime</name><path>{library}{os.sep}</path>'
+                 '</source></video></sources>')
+    return names
+
+
+def profile_files(kodi):
+    files = {}
+    for directory, _, filenames in os.walk(kodi.translate_path('special://profile')):
+        for filename in filenames:
+            stat = os.stat(os.path.join(directory, filename))
+            files[os.path.join(directory, filename)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+class Runner:
+    """Runs plugin calls like Kodi does, and collects their measurements by action"""
+
+    def __init__(self, kodi, server):
+        self.kodi = kodi
+        self.server = server
+        self.latencies = {}
+        self.counts = {}
+        # The first traceback of every action that raised
+        self.tracebacks = {}
+
+    def run(self, action, **params):
+        kodi = self.kodi
+        kodi.reset()
+        log_start = len(kodi.log)
+        requests_before = sum(self.server.statuses.values())
+        files_before = profile_files(kodi)
+        sys.argv = [PLUGIN_URL, '1', '?' + urllib.parse.urlencode(dict(action=action, **params))]
+
+        counts = self.counts.setdefault(
+            action, dict.fromkeys(list(COUNTED_MESSAGES) + ['requests', 'bytes written', 'errors'], 0))
+        start = time.perf_counter()
+        try:
+            runpy.run_path(MAIN, run_name='__main__')
+        except Exception:
+            counts['errors'] += 1
+            if action not in self.tracebacks:
+                self.tracebacks[action] = traceback.format_exc()
+                print(f'{action} raised:\n{self.tracebacks[action]}', file=sys.stderr)
+        self.latencies.setdefault(action, []).append(time.perf_counter() - start)
+
+        for message in kodi.log[log_start:]:
+            for name, pattern in COUNTED_MESSAGES.items():
+                if pattern.search(message):
+                    counts[name] += 1
+        counts['requests'] += sum(self.server.statuses.values()) - requests_before
+        for path, (mtime, size) in profile_files(kodi).items():
+            if files_before.get(path, (None,))[0] != mtime:
+                counts['bytes written'] += size
+        return kodi.directory_items
+
+    def failed(self):
+        """Return the actions every call of which raised"""
+        return [action for action, latencies in self.latencies.items()
+                if self.counts[action]['errors'] == len(latencies)]
+
+    def scan(self, names):
+        """Scan every show of the library like Kodi does"""
+        for name in names:
+            items = self.run('find', title=name)
+            if not items:
+                continue
+            anime_id = items[0][0]
+            self.run('getdetails', url=anime_id)
+            for url, _, _ in self.run('getepisodelist', url=anime_id):
+                self.run('getepisodedetails', url=url)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(title, runner):
+    print(title)
+    print(f'{"action":18} {"calls":>6} {"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} {"max ms":>8} '
+          f'{"db hits":>8} {"resp hits":>9} {"requests":>8} {"written":>10} {"errors":>6}')
+    for action, latencies in runner.latencies.items():
+        counts = runner.counts[action]
+        lookups = counts['database hits'] + counts['database misses']
+        db_hits = f'{counts["database hits"] / lookups:.0%}' if lookups else '-'
+        print(f'{action:18} {len(latencies):6} '
+              + ' '.join(f'{percentile(latencies, fraction) * 1000:8.1f}'
+                         for fraction in (0.5, 0.9, 0.99, 1.0))
+              + f' {db_hits:>8} {counts["response cache hits"]:9} {counts["requests"]:8} '
+              f'{counts["bytes written"]:10} {counts["errors"]:6}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scraper actions headless.')
+    parser.add_argument('--shows', type=int, default=20)
+    parser.add_argument('--episodes', type=int, default=12)
+    parser.add_argument('--passes', type=int, default=2)
+    parser.add_argument('--cassette', help='replay this cassette instead of made up anime')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--rate-limit', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    network = dict(latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                   error_rate=args.error_rate, seed=args.seed)
+    if args.cassette:
+        server = StubServer(('127.0.0.1', 0), cassette.Cassette(args.cassette).load(), **network)
+    else:
+        server = SyntheticAniList(('127.0.0.1', 0), args.episodes, **network)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as home:
+        names = build_library(home, args.shows, args.episodes)
+        kodi = Kodi(home, {'anilist_url': server.url})
+        kodi.install()
+        print(f'{len(names)} shows of {args.episodes} episodes, '
+              f'{args.latency * 1000:.0f}+-{args.jitter * 1000:.0f} ms per request')
+        failed = set()
+        for number in range(args.passes):
+            runner = Runner(kodi, server)
+            runner.scan(names)
+            report(f'\npass {number + 1} ({"empty" if number == 0 else "warm"} profile)', runner)
+            failed.update(runner.failed())
+        size = sum(size for _, size in profile_files(kodi).values())
+        print(f'\nprofile size: {size} bytes')
+
+    server.shutdown()
+    server.server_close()
+    if failed:
+        sys.exit(f'Every call of {", ".join(sorted(failed))} raised, the measurements are meaningless')
+
+
+if __name__ == '__main__':
+    main()
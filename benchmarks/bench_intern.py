@@ -0,0 +1,44 @@
+"""Measure the memory held by `anitopy.parse_many` results with and without an
+interning table, on synthetic season folders built from the filename corpus.
+Run with `python benchmarks/bench_intern.py [filenames]`."""
+import sys
+import tracemalloc
+
+from bench_parse_many import build_folders
+from common import load_corpus
+
+import anitopy
+
+
+def measure(filenames, config, intern_table):
+    tracemalloc.start()
+    results = anitopy.parse_many(filenames, config, intern_table)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, current, peak
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    corpus = load_corpus()
+    folders = build_folders(corpus, 1)
+    episodes = -(-total // len(folders))
+    filenames = [name for folder in build_folders(corpus, episodes)
+                 for name in folder][:total]
+
+    print(f'{len(filenames)} filenames')
+    for label, config in (('full', None),
+                          ('title only', anitopy.ParserConfig({'title_only': True}))):
+        plain, plain_current, plain_peak = measure(filenames, config, None)
+        interned, interned_current, interned_peak = measure(filenames, config, {})
+        if plain != interned:
+            raise Exception('Interned results differ')
+        del plain, interned
+        print(f'{label}:')
+        print(f'  plain:     {plain_current / 2**20:7.2f} MiB held  {plain_peak / 2**20:7.2f} MiB peak')
+        print(f'  interned:  {interned_current / 2**20:7.2f} MiB held  {interned_peak / 2**20:7.2f} MiB peak'
+              f'  ({1 - interned_current / plain_current:.0%} less held)')
+
+
+if __name__ == '__main__':
+    main()
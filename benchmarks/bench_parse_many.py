@@ -0,0 +1,58 @@
+"""Compare parsing every filename with `anitopy.parse_many` on synthetic season
+folders built from the filename corpus.
+Run with `python benchmarks/bench_parse_many.py [files per folder]`."""
+import sys
+import random
+import time
+
+from common import load_corpus
+
+import anitopy
+
+
+def build_folders(filenames, episodes, seed=0):
+    """Turn every corpus filename with a single episode number into a folder
+    of `episodes` filenames that only differ in episode number and checksum"""
+    rng = random.Random(seed)
+    folders = []
+    for filename in filenames:
+        parsed = anitopy.parse(filename) or {}
+        episode = parsed.get('episode_number')
+        if not isinstance(episode, str) or filename.count(episode) != 1:
+            continue
+        checksum = parsed.get('file_checksum')
+        width = len(episode)
+        folder = []
+        for number in range(1, episodes + 1):
+            name = filename.replace(episode, str(number).zfill(width))
+            if isinstance(checksum, str):
+                name = name.replace(checksum, '%08X' % rng.getrandbits(32))
+            folder.append(name)
+        folders.append(folder)
+    return folders
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    folders = build_folders(load_corpus(), episodes)
+    total = sum(len(folder) for folder in folders)
+
+    start = time.perf_counter()
+    expected = [[anitopy.parse(name) for name in folder] for folder in folders]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [anitopy.parse_many(folder) for folder in folders]
+    batch_time = time.perf_counter() - start
+
+    if results != expected:
+        raise Exception('parse_many results differ from parse')
+
+    print(f'{len(folders)} folders, {total} filenames')
+    print(f'parse:       {single_time:8.2f} s  {total / single_time:10.0f} files/s')
+    print(f'parse_many:  {batch_time:8.2f} s  {total / batch_time:10.0f} files/s')
+    print(f'speedup:     {single_time / batch_time:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
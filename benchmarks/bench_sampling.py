@@ -0,0 +1,80 @@
+"""Compare parsing every file of large synthetic folders with the sampling mode of the
+find action, which stops once the leading title is statistically clear.
+Run with `python benchmarks/bench_sampling.py [episodes] [sample size] [confidence]`."""
+import os
+import sys
+import random
+import time
+
+from bench_parse_many import build_folders
+from common import ROOT, load_corpus
+
+import anitopy
+
+sys.path.insert(0, os.path.join(ROOT, 'metadata.aniscraper'))
+import sampling  # noqa: E402
+
+
+def build_library(filenames, episodes, seed=0):
+    """Return (title, episodes) pairs, where episodes are (folder, file) pairs of a show
+    split into season folders, with some files of other shows mixed in"""
+    rng = random.Random(seed)
+    folders = build_folders(filenames, episodes, seed)
+    libraries = []
+    for index, folder in enumerate(folders[:20]):
+        title = anitopy.parse(folder[0]).title
+        show = [(f'Season {number // 100 + 1}', name) for number, name in enumerate(folder)]
+        # Extras and misnamed files of other shows
+        for other in rng.sample(folders, 5):
+            show.extend(('Extras', name) for name in other[:episodes // 20])
+        rng.shuffle(show)
+        libraries.append((title, show))
+    return libraries
+
+
+def count_titles(path_parser, episodes, counts):
+    paths = [folder + '/' + file for folder, file in episodes]
+    for parsed in path_parser.parse_many(paths):
+        if parsed is not None and parsed.title is not None:
+            counts[parsed.title] = counts.get(parsed.title, 0) + 1
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    sample_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    confidence = float(sys.argv[3]) if len(sys.argv) > 3 else 0.95
+    config = anitopy.ParserConfig({'title_only': True})
+    libraries = build_library(load_corpus(), episodes)
+
+    full_time = sample_time = 0
+    full_files = sample_files = 0
+    mismatches = 0
+    for title, show in libraries:
+        start = time.perf_counter()
+        counts = {}
+        count_titles(anitopy.PathParser(config), show, counts)
+        full_leader = max(counts, key=counts.get)
+        full_time += time.perf_counter() - start
+        full_files += len(show)
+
+        start = time.perf_counter()
+        counts = {}
+        path_parser = anitopy.PathParser(config)
+        for batch in sampling.sample_batches(show, sample_size, seed=title):
+            count_titles(path_parser, batch, counts)
+            sample_files += len(batch)
+            if sampling.leader_is_clear(list(counts.values()), confidence):
+                break
+        sample_leader = max(counts, key=counts.get)
+        sample_time += time.perf_counter() - start
+        mismatches += sample_leader != full_leader
+
+    print(f'{len(libraries)} folders of {full_files // len(libraries)} files, '
+          f'sample size {sample_size}, confidence {confidence}')
+    print(f'full:     {full_time:8.2f} s  {full_files:8} files parsed')
+    print(f'sampled:  {sample_time:8.2f} s  {sample_files:8} files parsed')
+    print(f'speedup:  {full_time / sample_time:8.2f}x, {mismatches} different leaders')
+
+
+if __name__ == '__main__':
+    main()
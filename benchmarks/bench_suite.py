@@ -0,0 +1,176 @@
+"""Measure anitopy throughput, time per parser stage and peak memory on each
+corpus, and the time to import anitopy and parse a first filename. Compare
+them with a stored baseline.
+
+The corpora are the files in benchmarks/corpus: real-world names, fansub
+releases, batch ranges, CJK names and season/episode patterns. Throughput is
+machine dependent, so record a baseline on the machine you compare on before
+changing the parser. A corpus whose files/s drops by more than the tolerance,
+or an import and first parse that take more than the tolerance longer, is
+flagged and the script exits with status 1.
+Run with `python benchmarks/bench_suite.py [--save-baseline] [--tolerance 0.15]`."""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tracemalloc
+
+from common import ROOT, load_corpus
+
+import anitopy
+
+CORPORA = ('filenames', 'fansub', 'batch', 'cjk', 'season_episode')
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+STAGE_LABELS = {
+    '_tokenize_by_brackets': 'tokenize',
+    'search_for_keywords': 'keywords',
+    'search_for_isolated_numbers': 'numbers',
+    'search_for_episode_number': 'numbers',
+    'search_for_anime_title': 'title',
+    'search_for_release_group': 'release group',
+    'search_for_episode_title': 'episode title',
+    'validate_elements': 'validate',
+}
+
+
+def load_corpora():
+    return {name: load_corpus(os.path.join(ROOT, 'benchmarks', 'corpus', name + '.txt'))
+            for name in CORPORA}
+
+
+def files_per_second(filenames, repeat):
+    # Warm up the keyword caches first
+    for filename in filenames:
+        anitopy.parse(filename)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for filename in filenames:
+            anitopy.parse(filename)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(filenames) / best
+
+
+def stage_times(filenames):
+    """Time every stage with the parser's stats hook, in a separate pass"""
+    times = dict.fromkeys(STAGE_LABELS.values(), 0.0)
+    counts = {'tokens': 0, 'neighbour searches': 0}
+    for filename in filenames:
+        stats = anitopy.ParseStats()
+        anitopy.parse(filename, stats=stats)
+        for stage, elapsed in stats.stage_times.items():
+            times[STAGE_LABELS[stage]] += elapsed
+        counts['tokens'] += stats.token_count
+        counts['neighbour searches'] += stats.neighbour_searches
+    return times, counts
+
+
+def peak_memory(filenames):
+    """Peak memory of parsing the corpus and keeping the results"""
+    tracemalloc.start()
+    results = [anitopy.parse(filename) for filename in filenames]
+    del results
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import anitopy
+imported = time.perf_counter()
+anitopy.parse('[Group] Title - 01 [1080p].mkv')
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def import_times(repeat):
+    """Best time of `import anitopy` and of the first parse after it, each
+    in a new interpreter"""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SCRIPT,
+             os.path.join(ROOT, 'script.module.anitopy', 'lib')])
+        times = tuple(map(float, output.split()))
+        best = times if best is None else tuple(map(min, best, times))
+    return best
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arguments.add_argument('--baseline', default=BASELINE)
+    arguments.add_argument('--save-baseline', action='store_true')
+    arguments.add_argument('--tolerance', type=float, default=0.15)
+    arguments.add_argument('--repeat', type=int, default=5)
+    args = arguments.parse_args()
+
+    results = {}
+    import_time, first_parse_time = import_times(args.repeat * 4)
+    results['import'] = {'import_time': round(import_time, 5),
+                         'first_parse_time': round(first_parse_time, 5)}
+    print(f'import anitopy: {import_time * 1000:.2f} ms, '
+          f'first parse: {first_parse_time * 1000:.2f} ms')
+
+    for name, filenames in load_corpora().items():
+        rate = files_per_second(filenames, args.repeat)
+        times, counts = stage_times(filenames)
+        peak = peak_memory(filenames)
+        results[name] = {'files_per_second': round(rate, 1), 'peak_memory': peak}
+
+        total = sum(times.values())
+        print(f'{name}: {len(filenames)} filenames, {rate:8.0f} files/s, '
+              f'peak {peak / 1024:.0f} KiB')
+        for label, elapsed in times.items():
+            print(f'  {label:<14} {elapsed * 1e6 / len(filenames):8.1f} us/file  '
+                  f'{elapsed / total:6.1%}')
+        for label, count in counts.items():
+            print(f'  {label:<20} {count / len(filenames):8.1f} per file')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as fs:
+            json.dump(results, fs, indent=2, sort_keys=True)
+            fs.write('\n')
+        print(f'Saved baseline to {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}, record one with --save-baseline')
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as fs:
+        baseline = json.load(fs)
+    regressions = []
+    print(f'Compared with {args.baseline}:')
+    if 'import' in baseline:
+        # The keyword tables load on the first parse, so both count
+        previous = baseline['import']['import_time'] + baseline['import']['first_parse_time']
+        current = import_time + first_parse_time
+        change = current / previous - 1
+        flag = change > args.tolerance
+        if flag:
+            regressions.append('import')
+        print(f'  {"import + parse":<16} {previous * 1000:8.2f} -> {current * 1000:8.2f} ms '
+              f'({change:+.1%}){"  REGRESSION" if flag else ""}')
+    for name, result in results.items():
+        if name not in baseline or name == 'import':
+            continue
+        previous = baseline[name]['files_per_second']
+        change = result['files_per_second'] / previous - 1
+        flag = change < -args.tolerance
+        if flag:
+            regressions.append(name)
+        print(f'  {name:<16} {previous:8.0f} -> {result["files_per_second"]:8.0f} files/s '
+              f'({change:+.1%}){"  REGRESSION" if flag else ""}')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
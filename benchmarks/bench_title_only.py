@@ -0,0 +1,43 @@
+"""Compare full anitopy parsing with the title-only parse mode used by the
+scanner. Run with `python benchmarks/bench_title_only.py`."""
+import time
+
+from common import load_corpus
+
+import anitopy
+
+
+def time_parse(filenames, config, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for filename in filenames:
+            anitopy.parse(filename, config)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    filenames = load_corpus()
+    full_config = anitopy.ParserConfig()
+    title_config = anitopy.ParserConfig({'title_only': True})
+
+    # Both modes have to agree on the title, otherwise the comparison is moot
+    for filename in filenames:
+        full = (anitopy.parse(filename, full_config) or {}).get('anime_title')
+        title = (anitopy.parse(filename, title_config) or {}).get('anime_title')
+        if full != title:
+            raise Exception(f'Title mismatch for "{filename}": {full!r} != {title!r}')
+
+    repeat = 5
+    full_time = time_parse(filenames, full_config, repeat)
+    title_time = time_parse(filenames, title_config, repeat)
+    print(f'{len(filenames)} filenames, best of {repeat}')
+    print(f'full parse:  {full_time * 1000:8.2f} ms  {len(filenames) / full_time:10.0f} files/s')
+    print(f'title only:  {title_time * 1000:8.2f} ms  {len(filenames) / title_time:10.0f} files/s')
+    print(f'speedup:     {full_time / title_time:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
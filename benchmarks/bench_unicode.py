@@ -0,0 +1,86 @@
+"""Benchmark keyword normalization and Latin-script detection on ASCII, CJK
+and mixed filenames, against the previous NFKD/unicodedata.name versions.
+Run with `python benchmarks/bench_unicode.py`."""
+import re
+import time
+import unicodedata as ud
+
+from common import load_corpus
+
+import anitopy
+from anitopy import parser_helper
+from anitopy.keyword import keyword_manager
+
+
+def normalize_baseline(string):
+    nfkd = ud.normalize('NFKD', string)
+    without_accents = ''.join([c for c in nfkd if not ud.combining(c)])
+    return without_accents.upper()
+
+
+def is_latin_char_baseline(char, cache={}):
+    return cache.setdefault(char, 'LATIN' in ud.name(char, ''))
+
+
+def is_mostly_latin_string_baseline(string):
+    if len(string) == 0:
+        return False
+    latin_length = len([char for char in string if is_latin_char_baseline(char)])
+    return latin_length / len(string) >= 0.5
+
+
+def is_cjk(string):
+    # CJK symbols, kana and ideographs, or halfwidth and fullwidth forms
+    return any('\u3000' <= char <= '\u9fff' or '\uff00' <= char <= '\uffef'
+               for char in string)
+
+
+def split_corpora(filenames):
+    ascii_names = [name for name in filenames if name.isascii()]
+    cjk_names = [name for name in filenames if is_cjk(name)]
+    return {'ascii': ascii_names, 'cjk': cjk_names, 'mixed': filenames}
+
+
+def best_time(function, items, repeat=5, loops=20):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for item in items:
+                function(item)
+        elapsed = (time.perf_counter() - start) / loops
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(label, baseline, current, count):
+    print(f'  {label:<12} {baseline * 1e6 / count:8.2f} us -> '
+          f'{current * 1e6 / count:8.2f} us  ({baseline / current:5.2f}x)')
+
+
+def main():
+    corpora = split_corpora(load_corpus())
+    for name, filenames in corpora.items():
+        words = [word for filename in filenames
+                 for word in re.split('[ _.\\[\\]()\u3010\u3011-]+', filename) if word]
+        for word in words:
+            assert normalize_baseline(word) == keyword_manager.normalize(word)
+        for filename in filenames:
+            assert is_mostly_latin_string_baseline(filename) == \
+                parser_helper.is_mostly_latin_string(filename)
+
+        print(f'{name}: {len(filenames)} filenames, {len(words)} words')
+        # The LRU cache would hide the cost of the ASCII fast path
+        report('normalize', best_time(normalize_baseline, words),
+               best_time(keyword_manager.normalize.__wrapped__, words), len(words))
+        report('normalize*', best_time(normalize_baseline, words),
+               best_time(keyword_manager.normalize, words), len(words))
+        report('latin', best_time(is_mostly_latin_string_baseline, filenames),
+               best_time(parser_helper.is_mostly_latin_string, filenames), len(filenames))
+        parse_time = best_time(anitopy.parse, filenames, repeat=3, loops=2)
+        print(f'  {"parse":<12} {parse_time * 1e6 / len(filenames):8.2f} us')
+    print('* with the LRU cache')
+
+
+if __name__ == '__main__':
+    main()
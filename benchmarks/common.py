@@ -0,0 +1,13 @@
+"""Shared helpers for the benchmark scripts. Importing this module makes the
+bundled anitopy importable."""
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'script.module.anitopy', 'lib'))
+
+CORPUS = os.path.join(ROOT, 'benchmarks', 'corpus', 'filenames.txt')
+
+
+def load_corpus(path=CORPUS):
+    with open(path, 'r', encoding='utf-8') as fs:
+        return [line.strip() for line in fs if line.strip()]
@@ -0,0 +1,140 @@
+"""In-memory stand-ins for the Kodi modules the scraper imports (xbmc, xbmcgui, xbmcplugin,
+xbmcaddon, xbmcvfs and web_pdb), so metadata.aniscraper/main.py can run outside of Kodi.
+Files are real: special:// paths map to directories on disk. Everything the scraper hands
+to Kodi is recorded in a Kodi object instead of shown."""
+import os
+import sys
+import types
+import xml.etree.ElementTree as ET
+
+from common import ROOT
+
+ADDON_ID = 'metadata.aniscraper'
+SETTINGS = os.path.join(ROOT, ADDON_ID, 'resources', 'settings.xml')
+
+
+def default_settings(path=SETTINGS):
+    """Return the default value of every setting in the addon's settings.xml"""
+    return {setting.get('id'): setting.get('default', '')
+            for setting in ET.parse(path).getroot().iter('setting')}
+
+
+class Recorder:
+    """Records every method called on it, like the info tag of a list item"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return record
+
+
+class ListItem(Recorder):
+    def __init__(self, label='', label2='', offscreen=False):
+        super().__init__()
+        self.label = label
+        self.label2 = label2
+        self.tag = Recorder()
+
+    def getVideoInfoTag(self):
+        return self.tag
+
+
+class Kodi:
+    """The state of the stand-ins: settings, the special:// directories, the log and what the
+    current plugin call handed to Kodi"""
+
+    def __init__(self, home, settings=None):
+        self.home = home
+        self.settings = default_settings()
+        self.settings.update(settings or {})
+        self.log = []
+        self.reset()
+
+    def reset(self):
+        """Forget the results of the previous plugin call"""
+        self.directory_items = []
+        self.resolved = None
+        self.ended = False
+
+    def translate_path(self, path):
+        if path.startswith('special://'):
+            return os.path.join(self.home, *path[len('special://'):].split('/'))
+        return path
+
+    def setting(self, setting_id):
+        return self.settings[setting_id]
+
+    def install(self, monkeypatch=None):
+        """Register the stand-ins in sys.modules, through pytest's monkeypatch when given so they
+        are removed after the test"""
+        kodi = self
+
+        xbmc = types.ModuleType('xbmc')
+        xbmc.LOGDEBUG, xbmc.LOGINFO, xbmc.LOGWARNING, xbmc.LOGERROR = 0, 1, 2, 3
+        xbmc.log = lambda message, level=0: kodi.log.append(message)
+
+        xbmcgui = types.ModuleType('xbmcgui')
+        xbmcgui.ListItem = ListItem
+
+        xbmcplugin = types.ModuleType('xbmcplugin')
+
+        def add_directory_item(handle, url, listitem, isFolder=False, totalItems=0):
+            kodi.directory_items.append((url, listitem, isFolder))
+            return True
+
+        def set_resolved_url(handle, succeeded, listitem):
+            kodi.resolved = (succeeded, listitem)
+
+        def end_of_directory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+            kodi.ended = True
+        xbmcplugin.addDirectoryItem = add_directory_item
+        xbmcplugin.setResolvedUrl = set_resolved_url
+        xbmcplugin.endOfDirectory = end_of_directory
+
+        xbmcaddon = types.ModuleType('xbmcaddon')
+
+        class Addon:
+            def __init__(self, id=ADDON_ID):
+                self.id = id
+
+            def getAddonInfo(self, key):
+                return {'id': self.id, 'name': 'aniscraper',
+                        'profile': f'special://profile/addon_data/{self.id}/'}[key]
+
+            def getSettingString(self, setting_id):
+                return kodi.setting(setting_id)
+
+            def getSettingInt(self, setting_id):
+                return int(kodi.setting(setting_id))
+
+            def getSettingBool(self, setting_id):
+                return str(kodi.setting(setting_id)).lower() == 'true'
+        xbmcaddon.Addon = Addon
+
+        xbmcvfs = types.ModuleType('xbmcvfs')
+        xbmcvfs.translatePath = self.translate_path
+        xbmcvfs.exists = lambda path: os.path.exists(self.translate_path(path))
+        xbmcvfs.mkdir = lambda path: os.makedirs(self.translate_path(path), exist_ok=True) or True
+
+        def listdir(path):
+            path = self.translate_path(path)
+            dirs, files = [], []
+            for entry in os.scandir(path):
+                (dirs if entry.is_dir() else files).append(entry.name)
+            return dirs, files
+        xbmcvfs.listdir = listdir
+
+        web_pdb = types.ModuleType('web_pdb')
+        web_pdb.set_trace = lambda *args, **kwargs: None
+
+        for module in (xbmc, xbmcgui, xbmcplugin, xbmcaddon, xbmcvfs, web_pdb):
+            if monkeypatch is None:
+                sys.modules[module.__name__] = module
+            else:
+                monkeypatch.setitem(sys.modules, module.__name__, module)
@@ -0,0 +1,128 @@
+"""Replay the plugin calls of a trace, recorded with the scraper's trace setting, against the
+current code, and compare the traced and replayed time, cache hits and requests per action.
+
+The calls run headless like in bench_actions.py, against the stub server. They start from the
+database and response cache the trace was started with, from the trace_start folder next to
+the trace file. Pass the library (or a copy of its folders) for find to scan.
+Run with `python benchmarks/replay_trace.py trace.jsonl [--library DIR]
+[--cassette FILE] [--latency 0.05] [--jitter 0.02] [--rate-limit 0] [--error-rate 0]`."""
+import os
+import sys
+import pickle
+import shutil
+import argparse
+import tempfile
+import threading
+
+from bench_actions import Runner, SyntheticAniList, percentile
+from common import ROOT
+from kodi_shim import ADDON_ID, Kodi
+from stub_server import StubServer
+
+sys.path.insert(0, os.path.join(ROOT, ADDON_ID))
+import actiontrace  # noqa: E402
+import cassette  # noqa: E402
+
+PROFILE = f'special://profile/addon_data/{ADDON_ID}'
+COUNTS = ('db_hits', 'db_misses', 'response_hits')
+
+
+def copy_profile(kodi, snapshot, library):
+    """Copy the snapshot of a trace to the profile folder, and point its database at the library"""
+    profile = kodi.translate_path(PROFILE)
+    shutil.copytree(snapshot, profile)
+    db_path = os.path.join(profile, 'db.bin')
+    if library and os.path.exists(db_path):
+        with open(db_path, 'rb') as fs:
+            db = pickle.load(fs)
+        db['sourcepath'] = library
+        with open(db_path, 'wb') as fs:
+            pickle.dump(db, fs, pickle.HIGHEST_PROTOCOL)
+
+
+def write_sources(kodi, library):
+    userdata = kodi.translate_path('special://userdata')
+    os.makedirs(userdata, exist_ok=True)
+    with open(os.path.join(userdata, 'sources.xml'), 'w', encoding='utf-8') as fs:
+        fs.write(f'<sources><video><source><name>Anime</name><path>{library}</path>'
+                 '</source></video></sources>')
+
+
+def summarize(calls):
+    """Return the traced calls' milliseconds and summed counters by action"""
+    summary = {}
+    for call in calls:
+        times, counts = summary.setdefault(call['action'], ([], dict.fromkeys(COUNTS + ('requests',), 0)))
+        times.append(call['ms'])
+        for name in COUNTS:
+            counts[name] += call['counts'].get(name, 0)
+        counts['requests'] += len(call['requests'])
+    return summary
+
+
+def report(recorded, replayed):
+    print(f'{"action":18} {"":8} {"calls":>6} {"p50 ms":>8} {"p90 ms":>8} '
+          + ' '.join(f'{name:>13}' for name in COUNTS + ('requests',)))
+    for action in recorded:
+        for label, summary in (('traced', recorded), ('replayed', replayed)):
+            times, counts = summary.get(action, ([], {}))
+            if not times:
+                print(f'{action:18} {label:8} {0:6}')
+                continue
+            print(f'{action:18} {label:8} {len(times):6} {percentile(times, 0.5):8.1f} '
+                  f'{percentile(times, 0.9):8.1f} '
+                  + ' '.join(f'{counts[name]:13}' for name in COUNTS + ('requests',)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a trace of scraper calls.')
+    parser.add_argument('trace')
+    parser.add_argument('--library', help='video source with the folders find scans')
+    parser.add_argument('--cassette', help='replay this cassette instead of made up anime')
+    parser.add_argument('--episodes', type=int, default=12, help='episodes of made up anime')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--rate-limit', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    calls = [call for call in actiontrace.load(args.trace) if call['action']]
+    network = dict(latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                   error_rate=args.error_rate, seed=args.seed)
+    if args.cassette:
+        server = StubServer(('127.0.0.1', 0), cassette.Cassette(args.cassette).load(), **network)
+    else:
+        server = SyntheticAniList(('127.0.0.1', 0), args.episodes, **network)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as home:
+        kodi = Kodi(home, {'anilist_url': server.url, 'trace_actions': 'true'})
+        library = os.path.join(os.path.abspath(args.library), '') if args.library else None
+        snapshot = actiontrace.snapshot_path(args.trace)
+        if os.path.isdir(snapshot):
+            copy_profile(kodi, snapshot, library)
+        else:
+            print(f'No snapshot at {snapshot}, replaying from an empty profile', file=sys.stderr)
+        if library:
+            write_sources(kodi, library)
+        kodi.install()
+
+        runner = Runner(kodi, server)
+        for call in calls:
+            runner.run(call['action'], **call['params'])
+        trace_path = os.path.join(kodi.translate_path(PROFILE), 'trace.jsonl')
+        replayed = actiontrace.load(trace_path) if os.path.exists(trace_path) else []
+
+    errors = sum(counts['errors'] for counts in runner.counts.values())
+    print(f'{len(calls)} traced calls, {len(replayed)} replayed, {errors} raised')
+    report(summarize(calls), summarize(replayed))
+
+    server.shutdown()
+    server.server_close()
+    if runner.failed():
+        sys.exit(f'Every call of {", ".join(runner.failed())} raised, the measurements are meaningless')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""A local stand-in for the AniList GraphQL API, replaying the responses of a cassette
+recorded by the scraper (see metadata.aniscraper/cassette.py). Latency, jitter, rate limiting
+and errors are injected from a seeded random generator, so runs are repeatable.
+Point the scraper's AniList URL setting at it to benchmark the network path offline.
+Run with `python benchmarks/stub_server.py cassette.jsonl [--port 8765] [--latency 0.1]
+[--jitter 0.05] [--rate-limit 90] [--error-rate 0.05] [--seed 0]`."""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'metadata.aniscraper'))
+import cassette  # noqa: E402
+import httpcache  # noqa: E402
+
+# AniList counts requests per minute
+RATE_LIMIT_WINDOW = 60
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, responses, latency=0.0, jitter=0.0, rate_limit=0,
+                 error_rate=0.0, seed=0):
+        super().__init__(address, StubHandler)
+        self.responses = responses
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_times = collections.deque()
+        # Responses sent by status, and requests missing from the cassette
+        self.statuses = collections.Counter()
+        self.misses = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def plan(self):
+        """Return the delay and status of the next response, a None status to replay it"""
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            if self.rate_limit:
+                now = time.monotonic()
+                while self.request_times and now - self.request_times[0] >= RATE_LIMIT_WINDOW:
+                    self.request_times.popleft()
+                if len(self.request_times) >= self.rate_limit:
+                    retry_after = RATE_LIMIT_WINDOW - (now - self.request_times[0])
+                    return delay, 429, retry_after
+                self.request_times.append(now)
+            if self.random.random() < self.error_rate:
+                return delay, 500, None
+            return delay, None, None
+
+    def respond(self, query, variables):
+        """Return the status and body of the recorded response to a query"""
+        response = self.responses.get(httpcache.response_key(query, variables))
+        if response is None:
+            with self.lock:
+                self.misses += 1
+            return 404, error_body('Not in the cassette.', 404)
+        return response
+
+    def remaining(self):
+        with self.lock:
+            return max(0, self.rate_limit - len(self.request_times))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        delay, status, retry_after = server.plan()
+        time.sleep(delay)
+
+        headers = {}
+        if server.rate_limit:
+            headers['X-RateLimit-Limit'] = str(server.rate_limit)
+            headers['X-RateLimit-Remaining'] = str(server.remaining())
+        if status == 429:
+            headers['Retry-After'] = str(int(retry_after) + 1)
+            body = error_body('Too Many Requests.', 429)
+        elif status == 500:
+            body = error_body('Internal Server Error', 500)
+        else:
+            status, body = server.respond(request['query'], request.get('variables') or {})
+
+        with server.lock:
+            server.statuses[status] += 1
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def error_body(message, status):
+    return json.dumps({'data': None, 'errors': [{'message': message, 'status': status}]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a cassette as the AniList API.')
+    parser.add_argument('cassette')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- seconds of latency')
+    parser.add_argument('--rate-limit', type=int, default=0, help='requests per minute, 0 for none')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction answered with a 500')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    responses = cassette.Cassette(args.cassette).load()
+    server = StubServer((args.host, args.port), responses, args.latency, args.jitter,
+                        args.rate_limit, args.error_rate, args.seed)
+    print(f'Replaying {len(responses)} responses at {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    print(f'statuses: {dict(server.statuses)}, not in the cassette: {server.misses}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Traces of plugin calls, for replaying real library scans with benchmarks/replay_trace.py,
+which reads them with load() outside of Kodi. A snapshot of the profile is taken when a trace
+file is started, so the replay starts from the same database and response cache."""
+import json
+import os
+import shutil
+import time
+
+# Characters of httpcache.response_key kept per request, enough to tell queries apart
+KEY_LENGTH = 12
+
+
+class Trace:
+    """Collects what happens in one plugin call and appends it to a file of JSON lines.
+    Each line has the time, action and params of the call, the milliseconds until the result
+    was handed to Kodi and until the end, the counters and the requests sent, as
+    [key, status, milliseconds]. Calls that raise are not written."""
+
+    def __init__(self, path: str, clock=time.perf_counter):
+        self.path = path
+        self.clock = clock
+        self.start = clock()
+        self.result_time = None
+        self.counts = {}
+        self.requests = []
+
+    def count(self, name: str):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def request(self, key: str, status: int, seconds: float):
+        self.requests.append([key[:KEY_LENGTH], status, round(seconds * 1000, 1)])
+
+    def result_handed(self):
+        """Mark the time Kodi got the result, the rest of the call is background work"""
+        self.result_time = self.clock()
+
+    def write(self, action: str, params: dict):
+        end = self.clock()
+        result_time = end if self.result_time is None else self.result_time
+        line = json.dumps({
+            'time': round(time.time(), 3),
+            'action': action,
+            'params': {key: value for key, value in params.items() if key != 'action'},
+            'ms': round((result_time - self.start) * 1000, 1),
+            'total_ms': round((end - self.start) * 1000, 1),
+            'counts': self.counts,
+            'requests': self.requests,
+        }, separators=(',', ':'))
+        with open(self.path, 'a', encoding='utf-8') as fs:
+            fs.write(line + '\n')
+
+
+def load(path: str) -> list:
+    """Return the traced calls of a trace file, oldest first"""
+    with open(path, 'r', encoding='utf-8') as fs:
+        return [json.loads(line) for line in fs if line.strip()]
+
+
+def snapshot_path(path: str) -> str:
+    """Return the folder the snapshot of the trace file at path is kept in"""
+    return os.path.splitext(path)[0] + '_start'
+
+
+def snapshot(path: str, sources: list):
+    """Copy the files and folders in sources to snapshot_path(path) if the trace file at path
+    is not started yet. Sources that do not exist are skipped."""
+    if os.path.exists(path):
+        return
+    target = snapshot_path(path)
+    # Copy and rename, so a replay never starts from half a snapshot
+    temp_target = f'{target}.{os.getpid()}'
+    os.makedirs(temp_target)
+    for source in sources:
+        copy = os.path.join(temp_target, os.path.basename(source))
+        if os.path.isdir(source):
+            shutil.copytree(source, copy)
+        elif os.path.exists(source):
+            shutil.copy2(source, copy)
+    # A snapshot left by a deleted trace file is replaced
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(temp_target, target)
@@ -0,0 +1,95 @@
+"""A circuit breaker for the AniList API, so a library scan stops waiting on every call while
+AniList is down. Every scraper call is a new process, so the breaker state is kept in a file
+in the profile folder."""
+import json
+import os
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of sending a request while the breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` failures in a row, so requests fail fast for `cooldown` seconds.
+    After that one request is let through as a probe: the breaker closes if it succeeds and
+    opens again if it fails. A probe that never reports back is given up after another cooldown.
+
+    The state file is read before and written after every change. Processes running at the
+    same time can lose each other's failures, which only delays opening the breaker."""
+
+    def __init__(self, path: str, threshold: int, cooldown: float, clock=time.time, log=None):
+        self.path = path
+        self.threshold = threshold
+        self.cooldown = cooldown
+        # Wall clock time, monotonic clocks are not comparable between processes
+        self.clock = clock
+        self.log = log
+
+    def load(self) -> dict:
+        """Return the saved state, or a closed breaker if there is none or it is unreadable"""
+        try:
+            with open(self.path, 'r') as fs:
+                state = json.load(fs)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault('state', CLOSED)
+        state.setdefault('failures', 0)
+        state.setdefault('changed', 0)
+        # Number of times the breaker changed to each state, and of requests it rejected
+        state.setdefault('counts', {})
+        return state
+
+    def save(self, state: dict):
+        # Write and rename, so other processes never read half a file
+        temp_path = f'{self.path}.{os.getpid()}'
+        with open(temp_path, 'w') as fs:
+            json.dump(state, fs)
+        os.replace(temp_path, self.path)
+
+    def change(self, state: dict, new_state: str):
+        if self.log is not None:
+            self.log(f"AniList circuit breaker {state['state']} -> {new_state} "
+                     f"after {state['failures']} failures")
+        state['state'] = new_state
+        state['changed'] = self.clock()
+        state['counts'][new_state] = state['counts'].get(new_state, 0) + 1
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now"""
+        state = self.load()
+        if state['state'] == CLOSED:
+            return True
+        if self.clock() - state['changed'] >= self.cooldown:
+            # Open for long enough, or the last probe was lost: send a probe
+            self.change(state, HALF_OPEN)
+            self.save(state)
+            return True
+        state['counts']['rejected'] = state['counts'].get('rejected', 0) + 1
+        self.save(state)
+        return False
+
+    def check(self):
+        """Raise CircuitOpen unless a request may be sent now"""
+        if not self.allow():
+            raise CircuitOpen("AniList is unreachable, not sending requests for a while")
+
+    def record_success(self):
+        state = self.load()
+        if state['state'] != CLOSED or state['failures']:
+            if state['state'] != CLOSED:
+                self.change(state, CLOSED)
+            state['failures'] = 0
+            self.save(state)
+
+    def record_failure(self):
+        state = self.load()
+        state['failures'] += 1
+        if state['state'] == HALF_OPEN or \
+                (state['state'] == CLOSED and state['failures'] >= self.threshold):
+            self.change(state, OPEN)
+        self.save(state)
@@ -0,0 +1,30 @@
+"""Recorded AniList requests and responses, for replaying scans without AniList with
+benchmarks/stub_server.py. Responses are looked up by the keys of the response cache."""
+import json
+
+import httpcache
+
+
+class Cassette:
+    """A file of JSON lines, one per request, with the query, its variables and the status and
+    body of the response. Lines are appended, so a cassette grows over several scans."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def record(self, query: str, variables: dict, status: int, body: str):
+        line = json.dumps({'query': query, 'variables': variables, 'status': status, 'body': body})
+        with open(self.path, 'a', encoding='utf-8') as fs:
+            fs.write(line + '\n')
+
+    def load(self) -> dict:
+        """Return the (status, body) responses by their httpcache.response_key, the last
+        recorded response of a request wins"""
+        responses = {}
+        with open(self.path, 'r', encoding='utf-8') as fs:
+            for line in fs:
+                if line.strip():
+                    entry = json.loads(line)
+                    key = httpcache.response_key(entry['query'], entry['variables'])
+                    responses[key] = (entry['status'], entry['body'])
+        return responses
@@ -0,0 +1,46 @@
+"""Time limits for scraper actions. Kodi gives up on a scraper call after a while, so every
+action gets a Deadline and its slow steps check it to return what they have in time. Blocking
+calls get a timeout that ends with the deadline."""
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a step is started with no time left"""
+
+
+class Deadline:
+    """The time an action has to finish by, on a monotonic clock. Pass a FakeClock as clock
+    to control time in tests."""
+
+    def __init__(self, seconds: float, clock=time.monotonic):
+        self.clock = clock
+        self.seconds = seconds
+        self.end = clock() + seconds
+
+    def remaining(self) -> float:
+        """Return the seconds left, never less than 0"""
+        return max(0.0, self.end - self.clock())
+
+    def expired(self, reserve: float = 0) -> bool:
+        """Return whether no more than reserve seconds are left"""
+        return self.remaining() <= reserve
+
+    def timeout(self, limit: float) -> float:
+        """Return a timeout for a blocking call, at most limit and never past the deadline"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("No time left for the action")
+        return min(limit, remaining)
+
+
+class FakeClock:
+    """A clock that only moves when it is advanced"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
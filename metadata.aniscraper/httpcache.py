@@ -0,0 +1,81 @@
+"""A disk cache of AniList responses, keyed by a hash of the query and its variables, so any
+query is cached without code for its shape. Expired responses are kept, as a fallback for
+when AniList cannot be reached."""
+import hashlib
+import json
+import os
+import time
+import zlib
+
+ENTRY_SUFFIX = '.json.z'
+
+
+def response_key(query: str, variables: dict) -> str:
+    """Return the cache key of a query, ignoring its whitespace and the order of its variables"""
+    document = ' '.join(query.split())
+    text = json.dumps([document, variables], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Stores each response zlib compressed in its own file in `directory`. Entries older than
+    `ttl` seconds are expired but kept, to be used when AniList cannot be reached. When the files
+    grow past `max_bytes` the least recently written are deleted."""
+
+    def __init__(self, directory: str, ttl: float, max_bytes: int, clock=time.time):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key: str, allow_expired: bool = False):
+        """Return the cached response, or None if there is none or it is expired"""
+        entry = self.entry(key, allow_expired)
+        return None if entry is None else entry[1]
+
+    def entry(self, key: str, allow_expired: bool = False):
+        """Return the time the response was stored and the response, or None if there is none
+        or it is expired"""
+        try:
+            with open(self.path(key), 'rb') as fs:
+                entry = json.loads(zlib.decompress(fs.read()).decode('utf-8'))
+        except (OSError, ValueError, zlib.error):
+            return None
+        if not allow_expired and self.clock() - entry['stored'] > self.ttl:
+            return None
+        return entry['stored'], entry['response']
+
+    def put(self, key: str, response):
+        """Store a response, then evict entries if the cache is too large"""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = json.dumps({'stored': self.clock(), 'response': response}, separators=(',', ':'))
+        # Write and rename, so other processes never read half a file
+        temp_path = f'{self.path(key)}.{os.getpid()}'
+        with open(temp_path, 'wb') as fs:
+            fs.write(zlib.compress(entry.encode('utf-8')))
+        os.replace(temp_path, self.path(key))
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently written entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if dir_entry.name.endswith(ENTRY_SUFFIX):
+                    stat = dir_entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already evicted by another process
+                pass
+            total -= size
@@ -17,7 +17,8 @@
 # TODO: File not found errors
 # TODO: Handle 404s
 
-import sys, os
+import sys, os, re, time
+import unicodedata
 import urllib.parse
 import xml.etree.ElementTree as ET
 import requests
@@ -26,7 +27,14 @@ import xbmcgui
 import xbmcplugin, xbmcaddon
 import xbmc, xbmcvfs
 
+import actiontrace
 import anitopy
+import breaker
+import cassette
+import deadline
+import httpcache
+import queries
+import sampling
 import web_pdb
 
 try:
@@ -45,6 +53,56 @@ __addon__   = xbmcaddon.Addon()
 __addonname__ = __addon__.getAddonInfo('name')
 __profile__ = xbmcvfs.translatePath(__addon__.getAddonInfo("profile"))
 __picklejar__ = os.path.join(__profile__, 'db.bin')
+__breakerfile__ = os.path.join(__profile__, 'breaker.json')
+__responsecache__ = os.path.join(__profile__, 'responses')
+__tracefile__ = os.path.join(__profile__, 'trace.jsonl')
+
+# The scanner only needs the anime title, so skip the later parser stages
+title_parser_config = anitopy.ParserConfig({'title_only': True})
+
+# Titles parsed with a lower confidence (see anitopy.parser) are only looked up
+# when no other title in the folder reaches it
+MIN_TITLE_CONFIDENCE = 0.5
+
+# Only this many of the candidates with the most files are looked up
+MAX_CANDIDATES = 5
+
+# Scanning and parsing stop when only this many seconds, or half the action's time limit when
+# that is less, are left for the AniList lookups
+LOOKUP_RESERVE = 5
+# Fragments of the AniList Media (see queries) each action uses
+FIND_FRAGMENTS = ('identity', 'artwork')
+DETAILS_FRAGMENTS = ('identity', 'listing', 'details', 'artwork')
+EPISODE_FRAGMENTS = ('identity', 'listing')
+ARTWORK_FRAGMENTS = ('identity', 'artwork')
+
+# Cached anime older than this many seconds are refreshed in the background
+CACHE_MAX_AGE = 24 * 60 * 60
+# AniList responses are cached for as long as anime, in at most this many bytes of compressed
+# files. Refreshes never read them, and anime looked up from them keep the response's age.
+RESPONSE_CACHE_TTL = CACHE_MAX_AGE
+RESPONSE_CACHE_MAX_BYTES = 20 * 1024 * 1024
+ANILIST_URL = 'https://graphql.anilist.co'
+# Timeout of a single AniList request, shortened to fit the action's deadline
+HTTP_TIMEOUT = 10
+# AniList requests fail fast for BREAKER_COOLDOWN seconds after this many failures in a row
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60
+# Files parsed between deadline checks when the folder is not sampled
+PARSE_BATCH_SIZE = 2000
+
+# Trailing season/part markers, e.g. "Season 2", "S2", "2nd Season", "Part 2", "Cour 2"
+TITLE_SUFFIX_PATTERN = re.compile(
+    r'(\s+(season\s*\d+|s\d+|\d+(st|nd|rd|th)\s+season|part\s*\d+|cour\s*\d+))+$')
+TITLE_PUNCTUATION_PATTERN = re.compile(r'[\W_]+')
+
+def canonical_title(title: str) -> str:
+    """Return the form of an anime title used to merge candidates: case, width, punctuation and
+    season/part suffixes are ignored"""
+    # NFKC folds fullwidth characters into their normal width
+    title = unicodedata.normalize('NFKC', title).casefold()
+    title = TITLE_PUNCTUATION_PATTERN.sub(' ', title).strip()
+    return TITLE_SUFFIX_PATTERN.sub('', title) or title
 
 params = get_params()
 plugin_handle = int(sys.argv[1])
@@ -55,8 +113,20 @@ def log(text):
     xbmc.log(u"[{0}] {1}".format(__addonname__, text.encode('ascii', 'replace')), level=xbmc.LOGDEBUG)
 
 class Main:
-    def __init__(self):
+    def __init__(self, deadline: deadline.Deadline, breaker: breaker.CircuitBreaker,
+                 response_cache: httpcache.ResponseCache, api_url: str = ANILIST_URL,
+                 cassette: cassette.Cassette = None, trace: actiontrace.Trace = None):
         # Properties
+        self.deadline = deadline
+        self.breaker = breaker
+        self.response_cache = response_cache
+        self.api_url = api_url
+        # Records every AniList request and response when set
+        self.cassette = cassette
+        # Records the cache hits and requests of this call when set
+        self.trace = trace
+        # (kind, key) pairs of stale anime, see run_refreshes
+        self._refresh_queue = []
         try:
             self.initjar()
         except Exception as e:
@@ -76,7 +146,7 @@ class Main:
 
             if not xbmcvfs.exists(__picklejar__):
                 log("Picklejar does not exist, creating empty jar")
-                pickle.dump({}, open(__picklejar__, 'wb'), pickle.HIGHEST_PROTOCOL)
+                self.resetjar()
 
             fs = open(__picklejar__, 'rb')
             self._db = pickle.load(fs)
@@ -84,23 +154,34 @@ class Main:
             return True
         except Exception as e:
             log("Exception thrown initializing the picklejar: " + str(e))
+            # Start from an empty database rather than none
+            self._db = {}
             return False
     
     def validate_db(self):
-        """Creates any db missing properties"""
+        """Creates any db missing properties, and saves the db if it had to"""
+        before = (len(self._db), len(self._db.get('anime', {})))
         self._db.setdefault('anime', {
             'titles': {},
             'ids': {}
         })
+        # Time each anime was fetched and the fragments it has, by id
+        self._db['anime'].setdefault('fetched', {})
+        self._db['anime'].setdefault('fragments', {})
         self._db.setdefault('sourcepath', None)
-        self.updatejar()
+        if (len(self._db), len(self._db['anime'])) != before:
+            self.updatejar()
 
     def updatejar(self):
         """Save the database to the picklejar"""
         try:
-            fs = open(__picklejar__, 'wb')
+            # Write and rename, so other processes never load half a jar. Refreshes run after
+            # the result is handed to Kodi, while Kodi already starts the next call.
+            temp_path = f'{__picklejar__}.{os.getpid()}'
+            fs = open(temp_path, 'wb')
             pickle.dump(self._db, fs, pickle.HIGHEST_PROTOCOL)
             fs.close()
+            os.replace(temp_path, __picklejar__)
             return True
         except Exception as e:
             log("Exception thrown updating the jar: " + str(e))
@@ -130,22 +211,21 @@ class Main:
 
             raise Exception(f"No folder with name \"{folder_name}\" found in any of the video sources in sources.xml")
     
-    def scan_anime(self, folder_path: str) -> str:
-        """Scan a folder for anime. Returns a dictionary with keyr = anime titles and values = list of absolute paths to episode files"""
-        def parse_anime(filename: str) -> str:
-            parsed = anitopy.parse(filename)
-            log("Parsed " + filename + " to " + str(parsed))
-            return parsed['anime_title']
-
-        anidict = {}
+    def scan_anime(self, source_path: str, folder_name: str) -> str:
+        """Scan a folder of a video source for anime. Returns a dictionary with keyr = anime titles and values = list of absolute paths to episode files.
+        When large folders are sampled, the lists only hold the files that were parsed."""
+        folder_path = os.path.join(source_path, folder_name)
+        reserve = min(LOOKUP_RESERVE, self.deadline.seconds / 2)
+        episodes = []
         def add_files(folder: str, files: list):
             for file in files:
                 if file.endswith('.mkv') or file.endswith('.mp4'):
-                    anime_title = parse_anime(file)
-                    anidict.setdefault(anime_title, [])
-                    anidict[anime_title].append(os.path.join(folder, file))
+                    episodes.append((folder, file))
 
         def scan(folder: str) -> dict:
+            if self.deadline.expired(reserve):
+                log("Out of time, not scanning " + folder)
+                return
             dirs, files = xbmcvfs.listdir(folder)
 
             add_files(folder, files)
@@ -154,17 +234,146 @@ class Main:
                 scan(os.path.join(folder, dir))
             
         scan(folder_path)
-        return anidict
-    
-    def sort_most_common_key(self, d: dict) -> str:
-        """Return the dict sorted by key with the longest list"""
-        return sorted(d.items(), key=lambda x: len(x[1]), reverse=True)
 
-    def _AL_qeury(self, query: str, variables: dict):
-        """Query the AniList API"""
-        url = 'https://graphql.anilist.co'
+        path_parser = anitopy.PathParser(title_parser_config)
+        sample = __addon__.getSettingBool('sample_large_folders') and \
+            len(episodes) > __addon__.getSettingInt('sample_size')
+        if sample:
+            confidence = __addon__.getSettingInt('sample_confidence') / 100
+            batches = sampling.sample_batches(episodes, __addon__.getSettingInt('sample_size'), seed=folder_path)
+        else:
+            batches = [episodes[i:i + PARSE_BATCH_SIZE] for i in range(0, len(episodes), PARSE_BATCH_SIZE)]
 
-        response = requests.post(url, json={'query': query, 'variables': variables})
+        anidict = {}
+        confidences = {}
+        candidates = {}
+        # Titles and other fields repeat across episodes, share their strings
+        intern_table = {}
+        parsed_count = 0
+        for batch in batches:
+            self.add_candidates(source_path, batch, path_parser, intern_table, anidict, confidences)
+            parsed_count += len(batch)
+            candidates = self.filter_candidates(*self.merge_candidates(anidict, confidences))
+            if sample and parsed_count < len(episodes) and \
+                    sampling.leader_is_clear([len(files) for files in candidates.values()], confidence):
+                log(f"Stopped sampling after {parsed_count} of {len(episodes)} files")
+                break
+            if parsed_count < len(episodes) and self.deadline.expired(reserve):
+                log(f"Out of time, using the candidates from {parsed_count} of {len(episodes)} files")
+                break
+        return candidates
+
+    def add_candidates(self, source_path: str, episodes: list, path_parser, intern_table: dict, anidict: dict,
+                       confidences: dict):
+        """Parse (folder, file) episodes and add their titles to anidict and confidences"""
+        # Paths relative to the video source, so the parser can use the names of
+        # the show folder and the folders below it as context. Templates are kept in
+        # path_parser and strings in intern_table, so the batches of a scan share them.
+        parsed_files = path_parser.parse_many(
+            [os.path.join(folder, file)[len(source_path):].lstrip('/\\') for folder, file in episodes], intern_table)
+        for (folder, file), parsed in zip(episodes, parsed_files):
+            if parsed is None or parsed.title is None:
+                log("Could not parse an anime title from " + file)
+                continue
+            log("Parsed " + file + " to " + parsed.title)
+            anime_title = parsed.title
+            anidict.setdefault(anime_title, [])
+            anidict[anime_title].append(os.path.join(folder, file))
+            confidences[anime_title] = max(confidences.get(anime_title, 0), parsed.title_confidence or 0)
+
+    def filter_candidates(self, anidict: dict, confidences: dict) -> dict:
+        """Drop unlikely titles before they cost AniList queries, unless they are all we have"""
+        if not any(confidence >= MIN_TITLE_CONFIDENCE for confidence in confidences.values()):
+            return anidict
+        filtered = {}
+        for anime_title, files in anidict.items():
+            if confidences[anime_title] < MIN_TITLE_CONFIDENCE:
+                log(f"Dropping candidate \"{anime_title}\" with title confidence {confidences[anime_title]}")
+            else:
+                filtered[anime_title] = files
+        return filtered
+
+    def merge_candidates(self, anidict: dict, confidences: dict) -> tuple:
+        """Merge candidate titles with the same canonical_title. A merged candidate has the files of all of
+        them, is named after the one with the most files and has the highest confidence among them."""
+        groups = {}
+        for anime_title in anidict:
+            groups.setdefault(canonical_title(anime_title), []).append(anime_title)
+
+        merged_anidict = {}
+        merged_confidences = {}
+        for anime_titles in groups.values():
+            anime_title = max(anime_titles, key=lambda title: len(anidict[title]))
+            if len(anime_titles) > 1:
+                log(f"Merging candidates {anime_titles} into \"{anime_title}\"")
+            merged_anidict[anime_title] = [file for title in anime_titles for file in anidict[title]]
+            merged_confidences[anime_title] = max(confidences[title] for title in anime_titles)
+        return merged_anidict, merged_confidences
+    
+    def sort_most_common_key(self, d: dict, k: int = MAX_CANDIDATES) -> list:
+        """Return the k items of the dict with the longest lists, longest first"""
+        return sampling.top_candidates(d, k)
+
+    def _AL_qeury(self, query: str, variables: dict, refresh=False):
+        """Query the AniList API, or return the cached response, with the time it was fetched.
+        With refresh the cached response is only used, even expired, when AniList cannot be
+        reached or the action is out of time."""
+        key = httpcache.response_key(query, variables)
+        cached = None if refresh else self.response_cache.entry(key)
+        if cached is not None:
+            log("Using cached AniList response")
+            self.count('response_hits')
+            return cached[1], cached[0]
+        try:
+            data = self._AL_post(query, variables)
+        except (breaker.CircuitOpen, requests.RequestException, deadline.DeadlineExceeded):
+            cached = self.response_cache.entry(key, allow_expired=True)
+            if cached is None:
+                raise
+            log("AniList is unreachable or out of time, using an expired cached response")
+            self.count('expired_response_hits')
+            return cached[1], cached[0]
+        fetched = time.time()
+        try:
+            self.response_cache.put(key, data)
+        except Exception as e:
+            log("Exception thrown caching the AniList response: " + str(e))
+        return data, fetched
+
+    def _AL_post(self, query: str, variables: dict):
+        """Send a query to the AniList API, raises breaker.CircuitOpen without sending it while
+        AniList is unreachable"""
+        # Before the breaker, which may let this request through as its probe: a probe that
+        # is never sent would keep every process waiting for another cooldown
+        timeout = self.deadline.timeout(HTTP_TIMEOUT)
+        self.breaker.check()
+        start = time.perf_counter()
+        try:
+            response = requests.post(self.api_url, json={'query': query, 'variables': variables},
+                                     timeout=timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            if self.trace is not None:
+                # Status 0 for requests without a response
+                self.trace.request(httpcache.response_key(query, variables), 0, time.perf_counter() - start)
+            raise
+        if self.trace is not None:
+            self.trace.request(httpcache.response_key(query, variables), response.status_code,
+                               time.perf_counter() - start)
+        # Errors about the query itself, like a 404 for an unknown anime, mean AniList is up
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if self.cassette is not None:
+            try:
+                self.cassette.record(query, variables, response.status_code, response.text)
+            except Exception as e:
+                log("Exception thrown recording the AniList response: " + str(e))
+        # An HTTPError is a RequestException, so _AL_qeury falls back to expired responses like
+        # it does when AniList cannot be reached
+        if response.status_code >= 500:
+            response.raise_for_status()
 
         json = response.json()
         if json.get('errors'):
@@ -172,156 +381,171 @@ class Main:
         else:
             return json['data']
 
-    def AL_get_anime_by_title(self, title: str):
-        """Uses the AniList API to search for anime by title"""
+    def AL_get_anime_by_title(self, title: str, fragments, refresh=False):
+        """Uses the AniList API to search for anime by title, fetching the named fragments (see queries).
+        Returns the anime and the time it was fetched, see _AL_qeury for refresh."""
         log("Using AniList API to search for anime: " + title)
-        query = '''
-        query ($search: String) {
-            Media (search: $search, type: ANIME) {
-                id
-                idMal
-                title {
-                    english
-                    romaji
-                }
-                description
-                coverImage {
-                    extraLarge
-                    medium
-                }
-                averageScore
-                meanScore
-                popularity
-                episodes
-                trailer {
-                    site
-                    id
-                }
-                genres
-                studios {
-                    nodes {
-                        name
-                    }
-                }
-                startDate {
-                    year
-                    month
-                    day
-                }
-                status
-                bannerImage
-                duration
-            }
-        }
-        '''
-        variables = {
-            'search': title
-        }
-
-        response = self._AL_qeury(query, variables)
+        response, fetched = self._AL_qeury(queries.media_query('search', fragments), {'search': title}, refresh)
         anime = response['Media']
         log(f"Anime with id {anime['id']} found!")
-        return anime
+        return anime, fetched
 
-    def AL_get_anime_by_id(self, id: int):
-        """Uses the AniList API to search for anime by id"""
+    def AL_get_anime_by_id(self, id: int, fragments, refresh=False):
+        """Uses the AniList API to search for anime by id, fetching the named fragments (see queries).
+        Returns the anime and the time it was fetched, see _AL_qeury for refresh."""
         log("Using AniList API to search for anime with id: " + str(id))
-        query = '''
-        query ($id: Int) {
-            Media (id: $id, type: ANIME) {
-                id
-                idMal
-                title {
-                    english
-                    romaji
-                }
-                description
-                coverImage {
-                    extraLarge
-                    medium
-                }
-                averageScore
-                meanScore
-                popularity
-                episodes
-                trailer {
-                    site
-                    id
-                }
-                genres
-                studios {
-                    nodes {
-                        name
-                    }
-                }
-                startDate {
-                    year
-                    month
-                    day
-                }
-                status
-                bannerImage
-                duration
-            }
-        }
-        '''
-        variables = {
-            'id': id
-        }
-
-        response = self._AL_qeury(query, variables)
+        response, fetched = self._AL_qeury(queries.media_query('id', fragments), {'id': id}, refresh)
         anime = response['Media']
         log(f"Anime with id {anime['id']} found!")
-        return anime
+        return anime, fetched
     
-    def fetch_anime_by_title(self, title: str, no_cache=False):
-        """Fetch anime by title from the database, or from the AniList API if not found"""
+    def fetch_anime_by_title(self, title: str, fragments, no_cache=False):
+        """Fetch anime by title from the database, or from the AniList API if not found.
+        Cached anime are returned right away; stale ones, or any with no_cache, are refreshed
+        by run_refreshes after the result is handed to Kodi. With no_cache anime missing from the
+        database are fetched from AniList, not from the response cache."""
         self.validate_db()
-        if self._db['anime']['titles'].get(title) and not no_cache:
+        cached = self._db['anime']['titles'].get(title)
+        if cached:
             log("Found anime in database")
-            return self._db['anime']['titles'][title]
+            self.count('db_hits')
+            if no_cache or self.is_stale(cached):
+                self.queue_refresh('title', title)
+            if not self.missing_fragments(cached, fragments):
+                return cached
+            # We know the id now, so fetch the rest by id
+            return self.fetch_anime_by_id(cached['id'], fragments)
         else:
             log(f"Fetching {title} from AniList API")
+            self.count('db_misses')
             try:
-                anime = self.AL_get_anime_by_title(title)
-                self._db['anime']['ids'][anime['id']] = anime
-                self._db['anime'][title] = self._db['anime']['ids'][anime['id']] # Faster when we have 2 search keys
-                self.updatejar()
-                return anime
+                anime, fetched = self.AL_get_anime_by_title(title, fragments, refresh=no_cache)
+                return self.store_anime(anime, fragments, fetched, title)
             except Exception as e:
                 log("Failed to fetch anime from AniList API: " + str(e))
                 return None
     
-    def fetch_anime_by_id(self, id: int):
-        """Fetch anime by title from the database, or from the AniList API if not found"""
+    def fetch_anime_by_id(self, id: int, fragments):
+        """Fetch anime by id from the database, or from the AniList API if not found or missing
+        some of the fragments. Stale anime are returned right away and refreshed by run_refreshes."""
         self.validate_db()
-        if self._db['anime']['ids'].get(id):
+        # Ids from Kodi are strings, the database uses AniList's ints
+        id = int(id)
+        cached = self._db['anime']['ids'].get(id)
+        missing = fragments
+        if cached:
             log("Found anime in database")
-            return self._db['anime']['ids'][id]
+            self.count('db_hits')
+            if self.is_stale(cached):
+                self.queue_refresh('id', id)
+            missing = self.missing_fragments(cached, fragments)
+            if not missing:
+                return cached
+        log(f"Fetching {', '.join(sorted(missing))} of {id} from AniList API")
+        self.count('db_misses')
+        try:
+            anime, fetched = self.AL_get_anime_by_id(id, missing)
+            return self.store_anime(anime, missing, fetched)
+        except Exception as e:
+            log("Failed to fetch anime from AniList API: " + str(e))
+            return None
+
+    def missing_fragments(self, anime: dict, fragments) -> set:
+        """Return the named fragments the cached anime does not have yet"""
+        return set(fragments) - self.cached_fragments(anime)
+
+    def cached_fragments(self, anime: dict) -> frozenset:
+        """Return the named fragments of the cached anime, anime cached before fragments were
+        stored were fetched whole"""
+        return self._db['anime']['fragments'].get(anime['id'], queries.ALL_FRAGMENTS)
+
+    def store_anime(self, anime: dict, fragments, fetched: float, title: str = None) -> dict:
+        """Save anime fetched from AniList at the time fetched with the named fragments in the database,
+        under its id, its english title and title. Fragments are merged into the cached anime, if any."""
+        cached = self._db['anime']['ids'].get(anime['id'])
+        if cached is None:
+            self._db['anime']['ids'][anime['id']] = anime
+            self._db['anime']['fragments'][anime['id']] = frozenset(fragments) | {'identity'}
         else:
-            log(f"Fetching {id} from AniList API")
+            # Update in place, the title keys refer to the same dict
+            cached.update(anime)
+            anime = cached
+            self._db['anime']['fragments'][anime['id']] = self.cached_fragments(anime) | set(fragments)
+        self._db['anime']['titles'][anime['title']['english']] = anime
+        if title is not None:
+            self._db['anime']['titles'][title] = anime # Faster when we have 2 search keys
+        self._db['anime']['fetched'][anime['id']] = fetched
+        self.updatejar()
+        return anime
+
+    def is_stale(self, anime: dict) -> bool:
+        """Return whether the cached anime is older than CACHE_MAX_AGE, anime cached before
+        fetch times were stored count as stale"""
+        return time.time() - self._db['anime']['fetched'].get(anime['id'], 0) > CACHE_MAX_AGE
+
+    def queue_refresh(self, kind: str, key):
+        """Queue a refresh of the anime with the given 'id' or 'title' for run_refreshes"""
+        if (kind, key) not in self._refresh_queue:
+            log(f"Queueing a refresh of anime with {kind} {key}")
+            self._refresh_queue.append((kind, key))
+
+    def run_refreshes(self):
+        """Fetch the fragments of the queued anime again. Called once the result is handed to Kodi,
+        and stops at the action's deadline; what is left stays stale and is queued again next time."""
+        for kind, key in self._refresh_queue:
+            if self.deadline.expired():
+                log("Out of time, skipping the remaining refreshes")
+                break
+            log(f"Refreshing anime with {kind} {key}")
             try:
-                anime = self.AL_get_anime_by_id(id)
-                self._db['anime']['ids'][anime['id']] = anime
-                self._db['anime'][anime['title']['english']] = self._db['anime']['ids'][anime['id']]
-                self.updatejar()
-                return anime
+                if kind == 'id':
+                    fragments = self.cached_fragments(self._db['anime']['ids'][key])
+                    anime, fetched = self.AL_get_anime_by_id(key, fragments, refresh=True)
+                else:
+                    fragments = self.cached_fragments(self._db['anime']['titles'][key])
+                    anime, fetched = self.AL_get_anime_by_title(key, fragments, refresh=True)
+                # The next call may have saved the jar since this one loaded it, store into its
+                # version so its writes are kept
+                self.initjar()
+                self.validate_db()
+                self.store_anime(anime, fragments, fetched, key if kind == 'title' else None)
+            except breaker.CircuitOpen as e:
+                log("Skipping the remaining refreshes: " + str(e))
+                break
             except Exception as e:
-                log("Failed to fetch anime from AniList API: " + str(e))
-                return None
-
-main = Main()
+                log("Failed to refresh anime from AniList API: " + str(e))
+        self._refresh_queue = []
+
+    def count(self, name: str):
+        """Count an event in the trace, if this call is traced"""
+        if self.trace is not None:
+            self.trace.count(name)
+
+cassette_path = __addon__.getSettingString('record_cassette')
+trace = actiontrace.Trace(__tracefile__) if __addon__.getSettingBool('trace_actions') else None
+if trace is not None:
+    try:
+        actiontrace.snapshot(__tracefile__, [__picklejar__, __responsecache__])
+    except Exception as e:
+        log("Exception thrown snapshotting the profile for the trace: " + str(e))
+main = Main(deadline.Deadline(__addon__.getSettingInt('action_time_limit')),
+            breaker.CircuitBreaker(__breakerfile__, BREAKER_THRESHOLD, BREAKER_COOLDOWN, log=log),
+            httpcache.ResponseCache(__responsecache__, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES),
+            __addon__.getSettingString('anilist_url') or ANILIST_URL,
+            cassette.Cassette(cassette_path) if cassette_path else None, trace)
 
 if action == 'find':
     title = params['title']
     log(f'Find anime with title "{title}"')
-    anime_folder = os.path.join(main.sourcepath(title), title)
-    anime_candidates = main.scan_anime(anime_folder)
+    anime_candidates = main.scan_anime(main.sourcepath(title), title)
 
     anime_candidates = main.sort_most_common_key(anime_candidates)
     anime = None
     for title, episodes in anime_candidates:
-        anime = main.fetch_anime_by_title(title, no_cache=True) #! Remove no_cache=True in production
+        if main.deadline.expired():
+            log("Out of time, not looking up the remaining candidates")
+            break
+        anime = main.fetch_anime_by_title(title, FIND_FRAGMENTS, no_cache=True) #! Remove no_cache=True in production
         log(f"Got {str(anime)}")
         if anime is not None:
             break
@@ -350,7 +574,7 @@ if action == 'find':
 elif action == 'getdetails':
     anilist_id = params['url']
     log(f'Get details for anime with id {anilist_id}')
-    anime = main.fetch_anime_by_id(anilist_id)
+    anime = main.fetch_anime_by_id(anilist_id, DETAILS_FRAGMENTS)
     if not anime:
         raise Exception("No anime found for id " + anilist_id)
     
@@ -397,7 +621,7 @@ elif action == 'getepisodelist':
     anilist_id = params['url']
     log(f'Get episode list for anime with id {anilist_id}')
 
-    anime = main.fetch_anime_by_id(anilist_id)
+    anime = main.fetch_anime_by_id(anilist_id, EPISODE_FRAGMENTS)
     if not anime:
         raise Exception("No anime found for id " + anilist_id)
     
@@ -413,7 +637,7 @@ elif action == 'getepisodelist':
 elif action == 'getepisodedetails':
     anilist_id, season, episode = params['url'].split('-')
     log(f'Get episode {episode} details for anime with id {anilist_id}')
-    anime = main.fetch_anime_by_id(anilist_id)
+    anime = main.fetch_anime_by_id(anilist_id, EPISODE_FRAGMENTS)
 
     liz = xbmcgui.ListItem(f'Episode {episode}', offscreen=True)
     tags = liz.getVideoInfoTag()
@@ -429,7 +653,7 @@ elif action == 'getepisodedetails':
 elif action == 'getartwork':
     anilist_id = params['id']
     log(f'Get artwork for anime with id {anilist_id}')
-    anime = main.fetch_anime_by_id(anilist_id)
+    anime = main.fetch_anime_by_id(anilist_id, ARTWORK_FRAGMENTS)
 
     liz = xbmcgui.ListItem(anime['title']['english'], anime['title']['romaji'], offscreen=True)
     liz.addAvailableArtwork(anime['bannerImage'], 'banner')
@@ -447,3 +671,14 @@ elif action is not None:
     web_pdb.set_trace()
 
 xbmcplugin.endOfDirectory(plugin_handle)
+if trace is not None:
+    trace.result_handed()
+
+# Kodi has the result now, refresh stale cache entries in the remaining time
+main.run_refreshes()
+
+if trace is not None:
+    try:
+        trace.write(action, params)
+    except Exception as e:
+        log("Exception thrown writing the trace: " + str(e))
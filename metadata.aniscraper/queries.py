@@ -0,0 +1,69 @@
+"""GraphQL queries for the AniList API, built from named fragments so every action only asks
+for the fields it uses. Each combination of fragments is built once per process."""
+import functools
+
+# Fields of a Media, grouped by what they are used for
+FRAGMENTS = {
+    # Needed to store an anime, so it is part of every query
+    'identity': '''
+        id
+        idMal
+        title {
+            english
+            romaji
+        }''',
+    # Episode list and episode details
+    'listing': '''
+        episodes
+        duration
+        genres
+        studios {
+            nodes {
+                name
+            }
+        }''',
+    'details': '''
+        description
+        averageScore
+        meanScore
+        popularity
+        trailer {
+            site
+            id
+        }
+        startDate {
+            year
+            month
+            day
+        }
+        status''',
+    'artwork': '''
+        coverImage {
+            extraLarge
+            medium
+        }
+        bannerImage''',
+}
+
+ALL_FRAGMENTS = frozenset(FRAGMENTS)
+
+# GraphQL type of the arguments Media is looked up by
+ARGUMENT_TYPES = {
+    'search': 'String',
+    'id': 'Int',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _media_query(argument: str, fragments: tuple) -> str:
+    spreads = ' '.join(f'...{name}' for name in fragments)
+    definitions = ''.join(f'\nfragment {name} on Media {{{FRAGMENTS[name]}\n}}' for name in fragments)
+    return (f'query (${argument}: {ARGUMENT_TYPES[argument]}) {{\n'
+            f'    Media ({argument}: ${argument}, type: ANIME) {{ {spreads} }}\n'
+            f'}}{definitions}')
+
+
+def media_query(argument: str, fragments) -> str:
+    """Return a query for the Media with the given 'search' or 'id' argument, selecting the
+    named fragments and always the identity fragment"""
+    return _media_query(argument, tuple(sorted(set(fragments) | {'identity'})))
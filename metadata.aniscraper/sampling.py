@@ -0,0 +1,38 @@
+"""Helpers for parsing only a sample of a large folder in the find action. They do not
+depend on Kodi, so they can be benchmarked outside of it."""
+import heapq
+import math
+import random
+from statistics import NormalDist
+
+
+def sample_batches(episodes: list, batch_size: int, seed=None):
+    """Yield the (folder, file) episodes in batches of batch_size. Files are shuffled within
+    their folder and taken from every folder in turn, so each batch is a stratified sample."""
+    rng = random.Random(seed)
+    folders = {}
+    for episode in episodes:
+        folders.setdefault(episode[0], []).append(episode)
+    for files in folders.values():
+        rng.shuffle(files)
+
+    rounds = max([len(files) for files in folders.values()], default=0)
+    order = [files[i] for i in range(rounds) for files in folders.values() if i < len(files)]
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+
+def leader_is_clear(counts: list, confidence: float) -> bool:
+    """Return whether the largest count beats the second largest at the given one-sided
+    confidence, with a sign test using the normal approximation"""
+    top = heapq.nlargest(2, counts) + [0, 0]
+    leader, runner_up = top[0], top[1]
+    if leader == 0:
+        return False
+    z = NormalDist().inv_cdf(confidence)
+    return (leader - runner_up) / math.sqrt(leader + runner_up) > z
+
+
+def top_candidates(candidates: dict, k: int) -> list:
+    """Return the k (title, files) items with the most files, most first"""
+    return heapq.nlargest(k, candidates.items(), key=lambda item: len(item[1]))
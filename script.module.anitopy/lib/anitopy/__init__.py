@@ -11,6 +11,12 @@ Anitopy is a python library for parsing anime video filenames.
 from __future__ import absolute_import
 
 from anitopy.anitopy import parse
+from anitopy.batch import parse_many
+from anitopy.config import ParserConfig
+from anitopy.path import PathParser, parse_path
+from anitopy.result import ParseResult
+from anitopy.stats import ParseStats
 
 
-__all__ = ['parse']
+__all__ = ['parse', 'parse_many', 'parse_path', 'ParserConfig',
+           'ParseResult', 'ParseStats', 'PathParser']
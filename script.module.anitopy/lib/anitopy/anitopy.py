@@ -2,53 +2,64 @@
 
 from __future__ import unicode_literals, absolute_import
 
+from time import perf_counter
+
+from anitopy.config import ParserConfig, default_config
+from anitopy.config import default_options  # noqa: F401
 from anitopy.element import Elements, ElementCategory
 from anitopy.keyword import keyword_manager
 from anitopy.parser import Parser
+from anitopy.result import ParseResult
+from anitopy.stats import CountingTokens, ParseStats
 from anitopy.token import Tokens
 from anitopy.tokenizer import Tokenizer
 
 
-default_options = {
-    'allowed_delimiters': ' _.&+,|',
-    'ignored_strings': [],
-    'parse_episode_number': True,
-    'parse_episode_title': True,
-    'parse_file_extension': True,
-    'parse_release_group': True
-}
-
-
-def parse(filename, options=default_options):
+def parse(filename, options=None, stats=None):
+    # `options` is either an options dict or a ParserConfig. Callers parsing
+    # many files should build the ParserConfig once and pass it in.
+    # `stats` is either a ParseStats to fill in or a callback called with
+    # the ParseStats and the result. Without it nothing is measured.
+    config = get_config(options)
+    if stats is None:
+        return _parse(filename, config, None)
+
+    callback = None
+    if not isinstance(stats, ParseStats):
+        callback, stats = stats, ParseStats()
+    stats.filename = filename
+    start = perf_counter()
+    result = _parse(filename, config, stats)
+    stats.total_time = perf_counter() - start
+    if callback is not None:
+        callback(stats, result)
+    return result
+
+
+def _parse(filename, config, stats):
     elements = Elements()
-    tokens = Tokens()
-
-    # Add missing options
-    for key, value in default_options.items():
-        options.setdefault(key, value)
+    tokens = Tokens() if stats is None else CountingTokens(stats)
 
     elements.insert(ElementCategory.FILE_NAME, filename)
-    if options['parse_file_extension']:
+    if config.parse_file_extension:
         filename, extension = remove_extension_from_filename(filename)
         if extension:
             elements.insert(ElementCategory.FILE_EXTENSION, extension)
 
-    if options['ignored_strings']:
-        filename = remove_ignored_strings_from_filename(
-            filename, options['ignored_strings'])
+    filename = config.remove_ignored_strings(filename)
 
     if not filename:
         return None
 
-    tokenizer = Tokenizer(filename, options, elements, tokens)
+    tokenizer = Tokenizer(filename, config, elements, tokens, stats)
     if not tokenizer.tokenize():
         return None
 
-    parser = Parser(options, elements, tokens)
+    parser = Parser(config, elements, tokens, stats)
     if not parser.parse():
         return None
 
-    return elements.get_dictionary()
+    return ParseResult.from_elements(elements)
 
 
 def remove_extension_from_filename(filename):
@@ -73,7 +84,9 @@ def remove_extension_from_filename(filename):
     return new_filename, extension
 
 
-def remove_ignored_strings_from_filename(filename, ignored_strings):
-    for string in ignored_strings:
-        filename = filename.replace(string, '')
-    return filename
+def get_config(options):
+    if options is None:
+        return default_config
+    if isinstance(options, ParserConfig):
+        return options
+    return ParserConfig(options)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, absolute_import
+
+import re
+
+from anitopy import parser_helper, parser_number
+from anitopy.anitopy import get_config, parse
+from anitopy.element import ElementCategory
+from anitopy.keyword import keyword_manager
+from anitopy.result import ParseResult, get_layout
+from anitopy.tokenizer import BRACKETS
+
+HEX_PATTERN = re.compile('[0-9A-Fa-f]{8}$')
+DIGITS_PATTERN = re.compile('\\d+')
+# Only valid ordinals ("2nd", not "2rd") are season numbers, so their
+# numbers cannot change between filenames of a template
+ORDINAL_PATTERN = re.compile('\\d+(?:st|nd|rd|th)', re.IGNORECASE)
+
+
+def parse_many(filenames, options=None, intern_table=None, templates=None):
+    """Parse an iterable of filenames, returning a list of results.
+
+    Filenames that only differ in their numbers and checksums (e.g. the
+    episodes of a season) share a template. Only the first filename of each
+    template is parsed, the results of the others are derived from it by
+    substituting the variable fields. Filenames whose fields cannot be
+    derived unambiguously are parsed normally.
+
+    If `intern_table` is a dict, equal field values of the results share a
+    single string, kept in the table. If `templates` is a dict, the parsed
+    template representatives are kept in it, so later filenames with the
+    same templates are derived from them. Both can be passed to several
+    calls, `templates` only to calls with the same options.
+    """
+    config = get_config(options)
+    templater = Templater(config)
+    representatives = {} if templates is None else templates
+    results = []
+
+    for filename in filenames:
+        template, slots = templater.build(filename)
+        representative = representatives.get(template)
+        if representative is None:
+            result = parse(filename, config)
+            if intern_table is not None:
+                result = intern_result(result, intern_table)
+            # Numbers that are part of keywords are kept in the template
+            fixed_numbers = set(DIGITS_PATTERN.findall(template[0]))
+            representatives[template] = (slots, fixed_numbers, result)
+        else:
+            result = fill_template(filename, slots, *representative)
+            if result is None:
+                result = parse(filename, config)
+            if intern_table is not None:
+                result = intern_result(result, intern_table)
+        results.append(result)
+
+    return results
+
+
+def intern_result(result, table):
+    """Return `result` with its field values replaced by the equal strings
+    in `table`, adding the ones that are not there yet. File names are
+    unique, so they are left alone."""
+    if result is None:
+        return None
+
+    values = []
+    for category, value in result.fields():
+        if category is ElementCategory.FILE_NAME:
+            values.append(value)
+        elif isinstance(value, tuple):
+            values.append(tuple([table.setdefault(v, v) for v in value]))
+        else:
+            values.append(table.setdefault(value, value))
+    return ParseResult(result.categories, tuple(values), result.title_info)
+
+
+class Templater:
+    """Builds the structural template of a filename.
+
+    Digit runs and checksums are replaced by slots, unless they are part of
+    a keyword (e.g. "x264", "1080p", "V2") or an ordinal (e.g. "2nd"), in
+    which case they are kept as literal text. The template also records the properties of every number
+    the parser makes decisions on (length, year/episode/volume limits,
+    resolution values and the order of the numbers), so that filenames
+    with the same template are parsed the same way.
+    """
+
+    def __init__(self, config):
+        separators = ''.join(config.delimiter_set) + \
+            ''.join([opening + closing for opening, closing in BRACKETS])
+        self.word_pattern = re.compile(
+            '[^{0}]+'.format(re.escape(separators)))
+        self._keyword_cache = {}
+
+    def build(self, filename):
+        literals = []
+        slots = []
+        classes = []
+        numbers = []
+        position = 0
+
+        for match in self.word_pattern.finditer(filename):
+            word = match.group()
+            if self.is_keyword(word) or ORDINAL_PATTERN.fullmatch(word):
+                continue
+            if HEX_PATTERN.match(word):
+                literals.append(filename[position:match.start()])
+                literals.append('\0')
+                slots.append(word)
+                classes.append(('checksum', word.isdigit()))
+                position = match.end()
+                continue
+            for digits in DIGITS_PATTERN.finditer(word):
+                literals.append(
+                    filename[position:match.start() + digits.start()])
+                literals.append('\0')
+                slots.append(digits.group())
+                classes.append(number_class(digits.group()))
+                numbers.append(int(digits.group()))
+                position = match.start() + digits.end()
+
+        literals.append(filename[position:])
+
+        # Relative order of the numbers, equal numbers share their rank
+        ranks = {number: rank for rank, number in enumerate(sorted(set(numbers)))}
+        order = tuple([ranks[number] for number in numbers])
+
+        return (''.join(literals), tuple(classes), order), tuple(slots)
+
+    def is_keyword(self, word):
+        cache = self._keyword_cache
+        if word not in cache:
+            if not any(char.isdigit() for char in word):
+                cache[word] = False
+            else:
+                keyword = keyword_manager.normalize(word)
+                cache[word] = bool(
+                    keyword_manager.find(keyword) or
+                    keyword_manager.find(
+                        keyword, ElementCategory.FILE_EXTENSION) or
+                    parser_helper.is_resolution(word))
+        return cache[word]
+
+
+def number_class(digits):
+    number = int(digits)
+    return (
+        len(digits),
+        number == 0,
+        number <= parser_number.VOLUME_NUMBER_MAX,
+        number <= parser_number.EPISODE_NUMBER_MAX,
+        parser_number.ANIME_YEAR_MIN <= number <= parser_number.ANIME_YEAR_MAX,
+        number in (480, 720, 1080))
+
+
+def fill_template(filename, slots, representative_slots, fixed_numbers,
+                  representative):
+    """Derive the result for `filename` from the result of a filename with
+    the same template, or return None if it cannot be done unambiguously."""
+    if representative is None:
+        return None
+
+    replacements = {}
+    unchanged = set()
+    for old, new in zip(representative_slots, slots):
+        if old == new:
+            unchanged.add(old)
+        elif replacements.setdefault(old, new) != new:
+            return None  # Same value replaced by different values
+    if unchanged.intersection(replacements) or \
+            fixed_numbers.intersection(replacements):
+        return None  # A field with this value could come from either slot
+
+    used = set()
+
+    def fill_value(value):
+        if value in replacements:
+            used.add(value)
+            return replacements[value]
+        if any(old in value for old in replacements):
+            return None  # The field depends on a changed slot
+        return value
+
+    categories = []
+    values = []
+    for category, value in representative.fields():
+        if category is ElementCategory.FILE_NAME:
+            value = filename
+        elif isinstance(value, tuple):
+            value = tuple([fill_value(v) for v in value])
+            if None in value:
+                return None
+        else:
+            value = fill_value(value)
+            if value is None:
+                return None
+        categories.append(category)
+        values.append(value)
+
+    # Every changed slot has to show up in the result, otherwise we cannot
+    # tell how it was used
+    if len(used) != len(replacements):
+        return None
+
+    return ParseResult(get_layout(tuple(categories)), tuple(values),
+                       representative.title_info)
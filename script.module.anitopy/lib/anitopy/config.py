@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import re
+from types import MappingProxyType
+
+
+default_options = MappingProxyType({
+    'allowed_delimiters': ' _.&+,|',
+    'ignored_strings': (),
+    'parse_episode_number': True,
+    'parse_episode_title': True,
+    'parse_file_extension': True,
+    'parse_release_group': True,
+    'title_only': False
+})
+
+
+class ParserConfig(object):
+    """Immutable parser configuration compiled from an options dict.
+
+    Building a config precomputes everything that only depends on the
+    options, so it can be created once and passed to every `parse` call.
+    """
+
+    __slots__ = (
+        'allowed_delimiters',
+        'delimiter_set',
+        'delimiter_pattern',
+        'ignored_strings',
+        'ignored_strings_pattern',
+        'parse_episode_number',
+        'parse_episode_title',
+        'parse_file_extension',
+        'parse_release_group',
+        'title_only',
+        'stages',
+    )
+
+    def __init__(self, options=None):
+        merged_options = dict(default_options)
+        if options:
+            merged_options.update(options)
+
+        set_attribute = super(ParserConfig, self).__setattr__
+
+        allowed_delimiters = merged_options['allowed_delimiters']
+        set_attribute('allowed_delimiters', allowed_delimiters)
+        set_attribute('delimiter_set', frozenset(allowed_delimiters))
+        set_attribute('delimiter_pattern', re.compile('([{0}])'.format(
+            ''.join(['\\' + d for d in allowed_delimiters])))
+            if allowed_delimiters else None)
+
+        ignored_strings = tuple(
+            string for string in merged_options['ignored_strings'] if string)
+        set_attribute('ignored_strings', ignored_strings)
+        set_attribute('ignored_strings_pattern', re.compile('|'.join(
+            [re.escape(string) for string in ignored_strings]))
+            if ignored_strings else None)
+
+        for key in ('parse_episode_number', 'parse_episode_title',
+                    'parse_file_extension', 'parse_release_group',
+                    'title_only'):
+            set_attribute(key, bool(merged_options[key]))
+
+        set_attribute('stages', self._build_stages())
+
+    def _build_stages(self):
+        # Names of the Parser methods to run, in order
+        stages = ['search_for_keywords', 'search_for_isolated_numbers']
+        if self.parse_episode_number:
+            stages.append('search_for_episode_number')
+        stages.append('search_for_anime_title')
+
+        # The title only depends on the tokens identified by the steps above,
+        # so a title-only parse can stop here
+        if self.title_only:
+            return tuple(stages)
+
+        if self.parse_release_group:
+            stages.append('search_for_release_group')
+        if self.parse_episode_title:
+            stages.append('search_for_episode_title')
+        stages.append('validate_elements')
+        return tuple(stages)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ParserConfig is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('ParserConfig is immutable')
+
+    def __repr__(self):
+        return 'ParserConfig(allowed_delimiters={0!r}, ' \
+               'ignored_strings={1!r}, stages={2!r})'.format(
+                   self.allowed_delimiters, self.ignored_strings, self.stages)
+
+    def get_options(self):
+        return {
+            'allowed_delimiters': self.allowed_delimiters,
+            'ignored_strings': list(self.ignored_strings),
+            'parse_episode_number': self.parse_episode_number,
+            'parse_episode_title': self.parse_episode_title,
+            'parse_file_extension': self.parse_file_extension,
+            'parse_release_group': self.parse_release_group,
+            'title_only': self.title_only
+        }
+
+    def remove_ignored_strings(self, filename):
+        if self.ignored_strings_pattern is None:
+            return filename
+        return self.ignored_strings_pattern.sub('', filename)
+
+    def split_by_delimiters(self, text):
+        if self.delimiter_pattern is None:
+            return [text]
+        return self.delimiter_pattern.split(text)
+
+
+default_config = ParserConfig()
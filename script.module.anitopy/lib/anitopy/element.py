@@ -33,49 +33,60 @@ class ElementCategory(Enum):
     VOLUME_PREFIX = 'volume_prefix'
     UNKNOWN = 'unknown'
 
+    # Members are singletons, hashing by identity keeps dict and set lookups
+    # out of Enum.__hash__
+    __hash__ = object.__hash__
+
     @classmethod
     def is_searchable(cls, category):
-        searchable_categories = [
-            cls.ANIME_SEASON_PREFIX,
-            cls.ANIME_TYPE,
-            cls.AUDIO_TERM,
-            cls.DEVICE_COMPATIBILITY,
-            cls.EPISODE_PREFIX,
-            cls.FILE_CHECKSUM,
-            cls.LANGUAGE,
-            cls.OTHER,
-            cls.RELEASE_GROUP,
-            cls.RELEASE_INFORMATION,
-            cls.RELEASE_VERSION,
-            cls.SOURCE,
-            cls.SUBTITLES,
-            cls.VIDEO_RESOLUTION,
-            cls.VIDEO_TERM,
-            cls.VOLUME_PREFIX
-        ]
-        return category in searchable_categories
+        return category in SEARCHABLE_CATEGORIES
 
     @classmethod
     def is_singular(cls, category):
-        non_singular_categories = [
-            cls.ANIME_SEASON,
-            cls.ANIME_TYPE,
-            cls.AUDIO_TERM,
-            cls.DEVICE_COMPATIBILITY,
-            cls.EPISODE_NUMBER,
-            cls.LANGUAGE,
-            cls.OTHER,
-            cls.RELEASE_INFORMATION,
-            cls.SOURCE,
-            cls.VIDEO_TERM
-        ]
-        return category not in non_singular_categories
+        return category not in NON_SINGULAR_CATEGORIES
+
+
+# Looked up for every keyword and element access, so they are built once
+SEARCHABLE_CATEGORIES = frozenset([
+    ElementCategory.ANIME_SEASON_PREFIX,
+    ElementCategory.ANIME_TYPE,
+    ElementCategory.AUDIO_TERM,
+    ElementCategory.DEVICE_COMPATIBILITY,
+    ElementCategory.EPISODE_PREFIX,
+    ElementCategory.FILE_CHECKSUM,
+    ElementCategory.LANGUAGE,
+    ElementCategory.OTHER,
+    ElementCategory.RELEASE_GROUP,
+    ElementCategory.RELEASE_INFORMATION,
+    ElementCategory.RELEASE_VERSION,
+    ElementCategory.SOURCE,
+    ElementCategory.SUBTITLES,
+    ElementCategory.VIDEO_RESOLUTION,
+    ElementCategory.VIDEO_TERM,
+    ElementCategory.VOLUME_PREFIX
+])
+
+NON_SINGULAR_CATEGORIES = frozenset([
+    ElementCategory.ANIME_SEASON,
+    ElementCategory.ANIME_TYPE,
+    ElementCategory.AUDIO_TERM,
+    ElementCategory.DEVICE_COMPATIBILITY,
+    ElementCategory.EPISODE_NUMBER,
+    ElementCategory.LANGUAGE,
+    ElementCategory.OTHER,
+    ElementCategory.RELEASE_INFORMATION,
+    ElementCategory.SOURCE,
+    ElementCategory.VIDEO_TERM
+])
 
 
 class Elements:
     def __init__(self):
+        # Keyed by ElementCategory, converted to the values in
+        # get_dictionary
         self._elements = {}
         self._check_alt_number = False
+        self._title_info = None
 
     def get_check_alt_number(self):
         return self._check_alt_number
@@ -83,36 +94,45 @@ class Elements:
     def set_check_alt_number(self, value):
         self._check_alt_number = value
 
+    def get_title_info(self):
+        return self._title_info
+
+    def set_title_info(self, confidence, span):
+        self._title_info = (confidence, span)
+
     def insert(self, category, content):
-        self._elements.setdefault(category.value, []).append(content)
+        self._elements.setdefault(category, []).append(content)
 
     def erase(self, category):
         elements = self._elements
-        if category.value in elements:
-            del elements[category.value]
+        if category in elements:
+            del elements[category]
 
     def remove(self, category, content):
         elements = self._elements
-        elements[category.value].remove(content)
-        if len(elements[category.value]) == 0:
-            del elements[category.value]
+        elements[category].remove(content)
+        if len(elements[category]) == 0:
+            del elements[category]
 
     def contains(self, category):
-        return bool(category.value in self._elements.keys() and
-                    self._elements[category.value])
+        return bool(self._elements.get(category))
 
     def empty(self):
         return not bool(self._elements)
 
     def get(self, category):
         return self._elements.get(
-            category.value, '' if ElementCategory.is_singular(category)
+            category, '' if category not in NON_SINGULAR_CATEGORIES
             else [])
 
+    def items(self):
+        return self._elements.items()
+
     def get_dictionary(self):
         # Convert single element lists to the element itself
         elements = dict([
-            (category, value[0]) if len(value) == 1 else (category, value)
+            (category.value, value[0]) if len(value) == 1
+            else (category.value, value)
             for category, value in self._elements.items()
         ])
         return elements
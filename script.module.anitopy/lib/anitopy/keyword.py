@@ -2,142 +2,71 @@
 
 from __future__ import unicode_literals, absolute_import
 
+import os
+import threading
 import unicodedata as ud
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
 
 from anitopy.element import ElementCategory
 
 
-class KeywordOption:
-    def __init__(self, identifiable=True, searchable=True, valid=True):
-        self.identifiable = identifiable
-        self.searchable = searchable
-        self.valid = valid
+KeywordOption = namedtuple(
+    'KeywordOption', ['identifiable', 'searchable', 'valid'],
+    defaults=[True, True, True])
 
+Keyword = namedtuple('Keyword', ['category', 'options'])
 
-class Keyword:
-    def __init__(self, category, options):
-        self.category = category
-        self.options = options
+# KeywordOption flags in keyword_tables
+IDENTIFIABLE = 1 << 0
+SEARCHABLE = 1 << 1
+VALID = 1 << 2
+
+PEEK_ENTRIES = (
+    (ElementCategory.AUDIO_TERM, ('Dual Audio', 'Multi Audio')),
+    (ElementCategory.VIDEO_TERM, ('H264', 'H.264', 'h264', 'h.264')),
+    (ElementCategory.VIDEO_RESOLUTION, ('480p', '720p', '1080p')),
+    (ElementCategory.SUBTITLES, ('Multiple Subtitle', 'Multi Subs')),
+    (ElementCategory.SOURCE, ('Blu-Ray',))
+)
 
 
 class KeywordManager:
-    def __init__(self):
-        options_default = KeywordOption()
-        options_invalid = KeywordOption(valid=False)
-        options_unidentifiable = KeywordOption(identifiable=False)
-        options_unidentifiable_invalid = KeywordOption(identifiable=False,
-                                                       valid=False)
-        options_unidentifiable_unsearchable = KeywordOption(identifiable=False,
-                                                            searchable=False)
-
-        self._file_extensions = {}
-        self._keys = {}
-
-        self.add(ElementCategory.ANIME_SEASON_PREFIX, options_unidentifiable, [
-            'S', 'SAISON', 'SEASON'])
-
-        self.add(ElementCategory.ANIME_TYPE, options_unidentifiable, [
-            'GEKIJOUBAN', 'MOVIE',
-            'OAD', 'OAV', 'ONA', 'OVA',
-            'SPECIAL', 'SPECIALS',
-            'TV'])
-        self.add(ElementCategory.ANIME_TYPE,
-                 options_unidentifiable_unsearchable,
-                 ['SP'])  # e.g. "Yumeiro Patissiere SP Professional"
-        self.add(ElementCategory.ANIME_TYPE, options_unidentifiable_invalid, [
-            'ED', 'ENDING', 'NCED',
-            'NCOP', 'OP', 'OPENING',
-            'PREVIEW', 'PV'])
-
-        self.add(ElementCategory.AUDIO_TERM, options_default, [
-            # Audio channels
-            '2.0CH', '2CH', '5.1', '5.1CH', 'DTS', 'DTS-ES', 'DTS5.1',
-            'TRUEHD5.1',
-            # Audio codec
-            'AAC', 'AACX2', 'AACX3', 'AACX4', 'AC3', 'EAC3', 'E-AC-3',
-            'FLAC', 'FLACX2', 'FLACX3', 'FLACX4', 'LOSSLESS', 'MP3', 'OGG',
-            'VORBIS',
-            # Audio language
-            'DUALAUDIO', 'DUAL AUDIO', 'DUAL-AUDIO',
-            'MULTIAUDIO', 'MULTI AUDIO', 'MULTI-AUDIO'])
-
-        self.add(ElementCategory.DEVICE_COMPATIBILITY, options_default, [
-            'IPAD3', 'IPHONE5', 'IPOD', 'PS3', 'XBOX', 'XBOX360'])
-        self.add(ElementCategory.DEVICE_COMPATIBILITY, options_unidentifiable,
-                 ['ANDROID'])
-
-        self.add(ElementCategory.EPISODE_PREFIX, options_default, [
-            'EP', 'EP.', 'EPS', 'EPS.', 'EPISODE', 'EPISODE.', 'EPISODES',
-            'CAPITULO', 'EPISODIO', 'FOLGE'])
-        self.add(ElementCategory.EPISODE_PREFIX, options_invalid, [
-            'E', '\x7B2C'])  # single-letter episode keywords are not valid
-
-        self.add(ElementCategory.FILE_EXTENSION, options_default, [
-            '3GP', 'AVI', 'DIVX', 'FLV', 'M2TS', 'MKV', 'MOV', 'MP4', 'MPG',
-            'OGM', 'RM', 'RMVB', 'TS', 'WEBM', 'WMV'])
-        self.add(ElementCategory.FILE_EXTENSION, options_invalid, [
-            'AAC', 'AIFF', 'FLAC', 'M4A', 'MP3', 'MKA', 'OGG', 'WAV', 'WMA',
-            '7Z', 'RAR', 'ZIP',
-            'ASS', 'SRT'])
-
-        self.add(ElementCategory.LANGUAGE, options_default, [
-            'ENG', 'ENGLISH', 'ESPANOL', 'JAP', 'PT-BR', 'SPANISH', 'VOSTFR'])
-        self.add(ElementCategory.LANGUAGE, options_unidentifiable, [
-            'ESP', 'ITA'])  # e.g. "Tokyo ESP", "Bokura ga Ita"
-
-        self.add(ElementCategory.OTHER, options_default, [
-            'REMASTER', 'REMASTERED', 'UNCENSORED', 'UNCUT',
-            'TS', 'VFR', 'WIDESCREEN', 'WS'])
-
-        self.add(ElementCategory.RELEASE_GROUP, options_default, [
-            'THORA'])
-
-        self.add(ElementCategory.RELEASE_INFORMATION, options_default, [
-            'BATCH', 'COMPLETE', 'PATCH', 'REMUX'])
-        self.add(ElementCategory.RELEASE_INFORMATION, options_unidentifiable, [
-            'END', 'FINAL'])  # e.g. "The End of Evangelion", "Final Approach"
-
-        self.add(ElementCategory.RELEASE_VERSION, options_default, [
-            'V0', 'V1', 'V2', 'V3', 'V4'])
-
-        self.add(ElementCategory.SOURCE, options_default, [
-            'BD', 'BDRIP', 'BLURAY', 'BLU-RAY',
-            'DVD', 'DVD5', 'DVD9', 'DVD-R2J', 'DVDRIP', 'DVD-RIP',
-            'R2DVD', 'R2J', 'R2JDVD', 'R2JDVDRIP',
-            'HDTV', 'HDTVRIP', 'TVRIP', 'TV-RIP',
-            'WEBCAST', 'WEBRIP'])
-
-        self.add(ElementCategory.SUBTITLES, options_default, [
-            'ASS', 'BIG5', 'DUB', 'DUBBED', 'HARDSUB', 'HARDSUBS', 'RAW',
-            'SOFTSUB', 'SOFTSUBS', 'SUB', 'SUBBED', 'SUBTITLED',
-            'MULTIPLE SUBTITLE', 'MULTI SUBS', 'MULTI-SUBS'])
-
-        self.add(ElementCategory.VIDEO_TERM, options_default, [
-            # Frame rate
-            '23.976FPS', '24FPS', '29.97FPS', '30FPS', '60FPS', '120FPS',
-            # Video codec
-            '8BIT', '8-BIT', '10BIT', '10BITS', '10-BIT', '10-BITS',
-            'HI10', 'HI10P', 'HI444', 'HI444P', 'HI444PP',
-            'H264', 'H265', 'H.264', 'H.265', 'X264', 'X265', 'X.264',
-            'AVC', 'HEVC', 'HEVC2', 'DIVX', 'DIVX5', 'DIVX6', 'XVID',
-            # Video format
-            'AVI', 'RMVB', 'WMV', 'WMV3', 'WMV9',
-            # Video quality
-            'HQ', 'LQ',
-            # Video resolution
-            'HD', 'SD'])
-
-        self.add(ElementCategory.VOLUME_PREFIX, options_default, [
-            'VOL', 'VOL.', 'VOLUME'])
+    """Keyword tables. They are loaded from the generated keyword_tables
+    module on first use and read-only afterwards, so a single instance can
+    be shared between threads. Adding keywords replaces a table with an
+    updated copy."""
+
+    def __init__(self, tables=None):
+        # (keys, file extensions), or None until loaded
+        self._tables = tables
+        self._lock = threading.Lock()
+
+    def _load_tables(self):
+        from anitopy import keyword_tables
+        with self._lock:
+            # Another thread may have loaded or added to them meanwhile
+            if self._tables is None:
+                self._tables = (load_table(keyword_tables.KEYS),
+                                load_table(keyword_tables.FILE_EXTENSIONS))
+            return self._tables
 
     def add(self, category, options, keywords):
-        keyword_container = self._get_keyword_container(category)
-        for keyword in keywords:
-            if not keyword:
-                continue
-            if keyword in keyword_container.keys():
-                continue
-            keyword_container[keyword] = Keyword(category, options)
+        self._tables or self._load_tables()
+        with self._lock:
+            keys, file_extensions = self._tables
+            is_extension = category == ElementCategory.FILE_EXTENSION
+            keyword_container = dict(file_extensions if is_extension else keys)
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                if keyword in keyword_container.keys():
+                    continue
+                keyword_container[keyword] = Keyword(category, options)
+            keyword_container = MappingProxyType(keyword_container)
+            self._tables = (keys, keyword_container) if is_extension \
+                else (keyword_container, file_extensions)
 
     def find(self, string, category=ElementCategory.UNKNOWN):
         keyword_container = self._get_keyword_container(category)
@@ -151,17 +80,9 @@ class KeywordManager:
 
     @staticmethod
     def peek(elements, string):
-        entries = [
-            (ElementCategory.AUDIO_TERM, ['Dual Audio', 'Multi Audio']),
-            (ElementCategory.VIDEO_TERM, ['H264', 'H.264', 'h264', 'h.264']),
-            (ElementCategory.VIDEO_RESOLUTION, ['480p', '720p', '1080p']),
-            (ElementCategory.SUBTITLES, ['Multiple Subtitle', 'Multi Subs']),
-            (ElementCategory.SOURCE, ['Blu-Ray'])
-        ]
-
         preidentified_tokens = []
 
-        for category, keywords in entries:
+        for category, keywords in PEEK_ENTRIES:
             for keyword in keywords:
                 keyword_begin_pos = string.find(keyword)
                 if keyword_begin_pos != -1:  # Found the keyword in the string
@@ -174,7 +95,12 @@ class KeywordManager:
         return sorted(preidentified_tokens)
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def normalize(string):
+        # ASCII has no accents to remove
+        if string.isascii():
+            return string.upper()
+
         # Remove accents and other special symbols
         nfkd = ud.normalize('NFKD', string)
         without_accents = ''.join([c for c in nfkd if not ud.combining(c)])
@@ -182,9 +108,171 @@ class KeywordManager:
         return without_accents.upper()
 
     def _get_keyword_container(self, category):
-        return self._file_extensions \
-               if category == ElementCategory.FILE_EXTENSION \
-               else self._keys
+        keys, file_extensions = self._tables or self._load_tables()
+        return file_extensions \
+            if category == ElementCategory.FILE_EXTENSION else keys
+
+
+def load_table(table):
+    container = {}
+    for category, flags, strings in table:
+        keyword = Keyword(ElementCategory(category), KeywordOption(
+            bool(flags & IDENTIFIABLE), bool(flags & SEARCHABLE),
+            bool(flags & VALID)))
+        container.update(dict.fromkeys(strings, keyword))
+    return MappingProxyType(container)
+
+
+def add_default_keywords(manager):
+    # The source of keyword_tables, regenerate it with write_tables after
+    # changing this
+    options_default = KeywordOption()
+    options_invalid = KeywordOption(valid=False)
+    options_unidentifiable = KeywordOption(identifiable=False)
+    options_unidentifiable_invalid = KeywordOption(identifiable=False,
+                                                   valid=False)
+    options_unidentifiable_unsearchable = KeywordOption(identifiable=False,
+                                                        searchable=False)
+
+    manager.add(ElementCategory.ANIME_SEASON_PREFIX, options_unidentifiable, [
+        'S', 'SAISON', 'SEASON'])
+
+    manager.add(ElementCategory.ANIME_TYPE, options_unidentifiable, [
+        'GEKIJOUBAN', 'MOVIE',
+        'OAD', 'OAV', 'ONA', 'OVA',
+        'SPECIAL', 'SPECIALS',
+        'TV'])
+    manager.add(ElementCategory.ANIME_TYPE,
+                options_unidentifiable_unsearchable,
+                ['SP'])  # e.g. "Yumeiro Patissiere SP Professional"
+    manager.add(ElementCategory.ANIME_TYPE, options_unidentifiable_invalid, [
+        'ED', 'ENDING', 'NCED',
+        'NCOP', 'OP', 'OPENING',
+        'PREVIEW', 'PV'])
+
+    manager.add(ElementCategory.AUDIO_TERM, options_default, [
+        # Audio channels
+        '2.0CH', '2CH', '5.1', '5.1CH', 'DTS', 'DTS-ES', 'DTS5.1',
+        'TRUEHD5.1',
+        # Audio codec
+        'AAC', 'AACX2', 'AACX3', 'AACX4', 'AC3', 'EAC3', 'E-AC-3',
+        'FLAC', 'FLACX2', 'FLACX3', 'FLACX4', 'LOSSLESS', 'MP3', 'OGG',
+        'VORBIS',
+        # Audio language
+        'DUALAUDIO', 'DUAL AUDIO', 'DUAL-AUDIO',
+        'MULTIAUDIO', 'MULTI AUDIO', 'MULTI-AUDIO'])
+
+    manager.add(ElementCategory.DEVICE_COMPATIBILITY, options_default, [
+        'IPAD3', 'IPHONE5', 'IPOD', 'PS3', 'XBOX', 'XBOX360'])
+    manager.add(ElementCategory.DEVICE_COMPATIBILITY, options_unidentifiable,
+                ['ANDROID'])
+
+    manager.add(ElementCategory.EPISODE_PREFIX, options_default, [
+        'EP', 'EP.', 'EPS', 'EPS.', 'EPISODE', 'EPISODE.', 'EPISODES',
+        'CAPITULO', 'EPISODIO', 'FOLGE'])
+    manager.add(ElementCategory.EPISODE_PREFIX, options_invalid, [
+        'E', '\x7B2C'])  # single-letter episode keywords are not valid
+
+    manager.add(ElementCategory.FILE_EXTENSION, options_default, [
+        '3GP', 'AVI', 'DIVX', 'FLV', 'M2TS', 'MKV', 'MOV', 'MP4', 'MPG',
+        'OGM', 'RM', 'RMVB', 'TS', 'WEBM', 'WMV'])
+    manager.add(ElementCategory.FILE_EXTENSION, options_invalid, [
+        'AAC', 'AIFF', 'FLAC', 'M4A', 'MP3', 'MKA', 'OGG', 'WAV', 'WMA',
+        '7Z', 'RAR', 'ZIP',
+        'ASS', 'SRT'])
+
+    manager.add(ElementCategory.LANGUAGE, options_default, [
+        'ENG', 'ENGLISH', 'ESPANOL', 'JAP', 'PT-BR', 'SPANISH', 'VOSTFR'])
+    manager.add(ElementCategory.LANGUAGE, options_unidentifiable, [
+        'ESP', 'ITA'])  # e.g. "Tokyo ESP", "Bokura ga Ita"
+
+    manager.add(ElementCategory.OTHER, options_default, [
+        'REMASTER', 'REMASTERED', 'UNCENSORED', 'UNCUT',
+        'TS', 'VFR', 'WIDESCREEN', 'WS'])
+
+    manager.add(ElementCategory.RELEASE_GROUP, options_default, [
+        'THORA'])
+
+    manager.add(ElementCategory.RELEASE_INFORMATION, options_default, [
+        'BATCH', 'COMPLETE', 'PATCH', 'REMUX'])
+    manager.add(ElementCategory.RELEASE_INFORMATION, options_unidentifiable, [
+        'END', 'FINAL'])  # e.g. "The End of Evangelion", "Final Approach"
+
+    manager.add(ElementCategory.RELEASE_VERSION, options_default, [
+        'V0', 'V1', 'V2', 'V3', 'V4'])
+
+    manager.add(ElementCategory.SOURCE, options_default, [
+        'BD', 'BDRIP', 'BLURAY', 'BLU-RAY',
+        'DVD', 'DVD5', 'DVD9', 'DVD-R2J', 'DVDRIP', 'DVD-RIP',
+        'R2DVD', 'R2J', 'R2JDVD', 'R2JDVDRIP',
+        'HDTV', 'HDTVRIP', 'TVRIP', 'TV-RIP',
+        'WEBCAST', 'WEBRIP'])
+
+    manager.add(ElementCategory.SUBTITLES, options_default, [
+        'ASS', 'BIG5', 'DUB', 'DUBBED', 'HARDSUB', 'HARDSUBS', 'RAW',
+        'SOFTSUB', 'SOFTSUBS', 'SUB', 'SUBBED', 'SUBTITLED',
+        'MULTIPLE SUBTITLE', 'MULTI SUBS', 'MULTI-SUBS'])
+
+    manager.add(ElementCategory.VIDEO_TERM, options_default, [
+        # Frame rate
+        '23.976FPS', '24FPS', '29.97FPS', '30FPS', '60FPS', '120FPS',
+        # Video codec
+        '8BIT', '8-BIT', '10BIT', '10BITS', '10-BIT', '10-BITS',
+        'HI10', 'HI10P', 'HI444', 'HI444P', 'HI444PP',
+        'H264', 'H265', 'H.264', 'H.265', 'X264', 'X265', 'X.264',
+        'AVC', 'HEVC', 'HEVC2', 'DIVX', 'DIVX5', 'DIVX6', 'XVID',
+        # Video format
+        'AVI', 'RMVB', 'WMV', 'WMV3', 'WMV9',
+        # Video quality
+        'HQ', 'LQ',
+        # Video resolution
+        'HD', 'SD'])
+
+    manager.add(ElementCategory.VOLUME_PREFIX, options_default, [
+        'VOL', 'VOL.', 'VOLUME'])
+
+
+def write_tables(path=None):
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'keyword_tables.py')
+    manager = KeywordManager(({}, {}))
+    add_default_keywords(manager)
+    keys, file_extensions = manager._tables
+
+    def format_table(name, container):
+        # Keywords with the same category and options share one entry
+        groups = {}
+        for string, keyword in container.items():
+            options = keyword.options
+            flags = (IDENTIFIABLE if options.identifiable else 0) | \
+                (SEARCHABLE if options.searchable else 0) | \
+                (VALID if options.valid else 0)
+            groups.setdefault((keyword.category.value, flags), []).append(
+                string)
+        lines = [name + ' = (']
+        for (category, flags), strings in groups.items():
+            lines.append('    ({0}, {1}, ('.format(ascii(category), flags))
+            line = '       '
+            for string in strings:
+                item = ' {0},'.format(ascii(string))
+                if len(line) + len(item) > 79:
+                    lines.append(line)
+                    line = '       '
+                line += item
+            lines.append(line)
+            lines.append('    )),')
+        lines.append(')')
+        return '\n'.join(lines)
+
+    with open(path, 'w', encoding='utf-8') as fs:
+        fs.write('# -*- coding: utf-8 -*-\n'
+                 '# Generated by anitopy.keyword.write_tables from\n'
+                 '# add_default_keywords, do not edit.\n'
+                 '# Entries are (category, flags, keywords), see\n'
+                 '# anitopy.keyword.\n\n')
+        fs.write(format_table('KEYS', keys) + '\n\n')
+        fs.write(format_table('FILE_EXTENSIONS', file_extensions) + '\n')
 
 
 keyword_manager = KeywordManager()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Generated by anitopy.keyword.write_tables from
+# add_default_keywords, do not edit.
+# Entries are (category, flags, keywords), see
+# anitopy.keyword.
+
+KEYS = (
+    ('anime_season_prefix', 6, (
+        'S', 'SAISON', 'SEASON',
+    )),
+    ('anime_type', 6, (
+        'GEKIJOUBAN', 'MOVIE', 'OAD', 'OAV', 'ONA', 'OVA', 'SPECIAL',
+        'SPECIALS', 'TV',
+    )),
+    ('anime_type', 4, (
+        'SP',
+    )),
+    ('anime_type', 2, (
+        'ED', 'ENDING', 'NCED', 'NCOP', 'OP', 'OPENING', 'PREVIEW', 'PV',
+    )),
+    ('audio_term', 7, (
+        '2.0CH', '2CH', '5.1', '5.1CH', 'DTS', 'DTS-ES', 'DTS5.1', 'TRUEHD5.1',
+        'AAC', 'AACX2', 'AACX3', 'AACX4', 'AC3', 'EAC3', 'E-AC-3', 'FLAC',
+        'FLACX2', 'FLACX3', 'FLACX4', 'LOSSLESS', 'MP3', 'OGG', 'VORBIS',
+        'DUALAUDIO', 'DUAL AUDIO', 'DUAL-AUDIO', 'MULTIAUDIO', 'MULTI AUDIO',
+        'MULTI-AUDIO',
+    )),
+    ('device_compatibility', 7, (
+        'IPAD3', 'IPHONE5', 'IPOD', 'PS3', 'XBOX', 'XBOX360',
+    )),
+    ('device_compatibility', 6, (
+        'ANDROID',
+    )),
+    ('episode_prefix', 7, (
+        'EP', 'EP.', 'EPS', 'EPS.', 'EPISODE', 'EPISODE.', 'EPISODES',
+        'CAPITULO', 'EPISODIO', 'FOLGE',
+    )),
+    ('episode_prefix', 3, (
+        'E', '{2C',
+    )),
+    ('language', 7, (
+        'ENG', 'ENGLISH', 'ESPANOL', 'JAP', 'PT-BR', 'SPANISH', 'VOSTFR',
+    )),
+    ('language', 6, (
+        'ESP', 'ITA',
+    )),
+    ('other', 7, (
+        'REMASTER', 'REMASTERED', 'UNCENSORED', 'UNCUT', 'TS', 'VFR',
+        'WIDESCREEN', 'WS',
+    )),
+    ('release_group', 7, (
+        'THORA',
+    )),
+    ('release_information', 7, (
+        'BATCH', 'COMPLETE', 'PATCH', 'REMUX',
+    )),
+    ('release_information', 6, (
+        'END', 'FINAL',
+    )),
+    ('release_version', 7, (
+        'V0', 'V1', 'V2', 'V3', 'V4',
+    )),
+    ('source', 7, (
+        'BD', 'BDRIP', 'BLURAY', 'BLU-RAY', 'DVD', 'DVD5', 'DVD9', 'DVD-R2J',
+        'DVDRIP', 'DVD-RIP', 'R2DVD', 'R2J', 'R2JDVD', 'R2JDVDRIP', 'HDTV',
+        'HDTVRIP', 'TVRIP', 'TV-RIP', 'WEBCAST', 'WEBRIP',
+    )),
+    ('subtitles', 7, (
+        'ASS', 'BIG5', 'DUB', 'DUBBED', 'HARDSUB', 'HARDSUBS', 'RAW',
+        'SOFTSUB', 'SOFTSUBS', 'SUB', 'SUBBED', 'SUBTITLED',
+        'MULTIPLE SUBTITLE', 'MULTI SUBS', 'MULTI-SUBS',
+    )),
+    ('video_term', 7, (
+        '23.976FPS', '24FPS', '29.97FPS', '30FPS', '60FPS', '120FPS', '8BIT',
+        '8-BIT', '10BIT', '10BITS', '10-BIT', '10-BITS', 'HI10', 'HI10P',
+        'HI444', 'HI444P', 'HI444PP', 'H264', 'H265', 'H.264', 'H.265', 'X264',
+        'X265', 'X.264', 'AVC', 'HEVC', 'HEVC2', 'DIVX', 'DIVX5', 'DIVX6',
+        'XVID', 'AVI', 'RMVB', 'WMV', 'WMV3', 'WMV9', 'HQ', 'LQ', 'HD', 'SD',
+    )),
+    ('volume_prefix', 7, (
+        'VOL', 'VOL.', 'VOLUME',
+    )),
+)
+
+FILE_EXTENSIONS = (
+    ('file_extension', 7, (
+        '3GP', 'AVI', 'DIVX', 'FLV', 'M2TS', 'MKV', 'MOV', 'MP4', 'MPG', 'OGM',
+        'RM', 'RMVB', 'TS', 'WEBM', 'WMV',
+    )),
+    ('file_extension', 3, (
+        'AAC', 'AIFF', 'FLAC', 'M4A', 'MP3', 'MKA', 'OGG', 'WAV', 'WMA', '7Z',
+        'RAR', 'ZIP', 'ASS', 'SRT',
+    )),
+)
@@ -7,32 +7,31 @@ from anitopy.element import ElementCategory
 from anitopy.keyword import keyword_manager
 from anitopy.token import TokenCategory, TokenFlags
 
+# Confidence of the anime title, depending on how it was found
+TITLE_CONFIDENCE_NON_ENCLOSED = 0.9
+TITLE_CONFIDENCE_ENCLOSED = 0.6
+# Nothing after the title was identified, so it may include more
+TITLE_CONFIDENCE_UNBOUNDED = 0.5
+# The episode number ending the title was only a guess
+TITLE_CONFIDENCE_LAST_NUMBER = 0.4
+
 
 class Parser:
-    def __init__(self, options, elements, tokens):
-        self.options = options
+    def __init__(self, config, elements, tokens, stats=None):
+        self.config = config
         self.elements = elements
         self.tokens = tokens
+        self.stats = stats
+        self._last_number_episode = False
 
     def parse(self):
-        self.search_for_keywords()
-
-        self.search_for_isolated_numbers()
-
-        if self.options['parse_episode_number']:
-            self.search_for_episode_number()
-
-        self.search_for_anime_title()
-
-        if self.options['parse_release_group'] and \
-                not self.elements.contains(ElementCategory.RELEASE_GROUP):
-            self.search_for_release_group()
-
-        if self.options['parse_episode_title'] and \
-                self.elements.contains(ElementCategory.EPISODE_NUMBER):
-            self.search_for_episode_title()
-
-        self.validate_elements()
+        stats = self.stats
+        if stats is None:
+            for stage in self.config.stages:
+                getattr(self, stage)()
+        else:
+            for stage in self.config.stages:
+                stats.run(stage, getattr(self, stage))
 
         return not self.elements.empty()
 
@@ -51,7 +50,7 @@ class Parser:
             keyword = keyword_manager.find(keyword_manager.normalize(word))
             if keyword:
                 category = keyword.category
-                if not self.options['parse_release_group'] and \
+                if not self.config.parse_release_group and \
                         category == ElementCategory.RELEASE_GROUP:
                     continue
                 if not ElementCategory.is_searchable(category) or \
@@ -154,7 +153,8 @@ class Parser:
             return
 
         # Consider using the last number as a last resort
-        parser_number.search_for_last_number(self.elements, self.tokens, tokens)
+        self._last_number_episode = parser_number.search_for_last_number(
+            self.elements, self.tokens, tokens)
 
     def search_for_anime_title(self):
         enclosed_title = False
@@ -189,6 +189,7 @@ class Parser:
             token_begin, TokenFlags.IDENTIFIER | (
                 TokenFlags.BRACKET if enclosed_title else TokenFlags.NONE
             ))
+        unbounded = token_end is None
 
         # If within the interval there's an open bracket without its matching
         # pair, move the upper endpoint back to the bracket
@@ -221,7 +222,25 @@ class Parser:
         parser_helper.build_element(self.elements, self.tokens, ElementCategory.ANIME_TITLE, token_begin,
                                     token_end, keep_delimiters=False)
 
+        if self.elements.contains(ElementCategory.ANIME_TITLE):
+            if enclosed_title:
+                confidence = TITLE_CONFIDENCE_ENCLOSED
+            elif self._last_number_episode:
+                confidence = TITLE_CONFIDENCE_LAST_NUMBER
+            elif unbounded:
+                confidence = TITLE_CONFIDENCE_UNBOUNDED
+            else:
+                confidence = TITLE_CONFIDENCE_NON_ENCLOSED
+            span = (self.tokens.get_index(token_begin),
+                    self.tokens.size() - 1 if token_end is None
+                    else self.tokens.get_index(token_end))
+            self.elements.set_title_info(confidence, span)
+
     def search_for_release_group(self):
+        # May have been found already via keywords
+        if self.elements.contains(ElementCategory.RELEASE_GROUP):
+            return
+
         token_end = None
         while True:
             # Find the first enclosed unknown token
@@ -259,6 +278,9 @@ class Parser:
             return
 
     def search_for_episode_title(self):
+        if not self.elements.contains(ElementCategory.EPISODE_NUMBER):
+            return
+
         token_end = None
         while True:
             # Find the first non-enclosed unknown token
@@ -3,13 +3,33 @@
 from __future__ import unicode_literals, absolute_import
 
 import re
-import unicodedata as ud
+from bisect import bisect_right
 
 from anitopy.element import ElementCategory
 from anitopy.token import TokenCategory, TokenFlags
 
 DASHES = '-\u2010\u2011\u2012\u2013\u2014\u2015'
 
+# Code point ranges of the characters with "LATIN" in their Unicode name,
+# generated with unicodedata (Unicode 14.0.0)
+LATIN_RANGES = (
+    (0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x00D6), (0x00D8, 0x00F6),
+    (0x00F8, 0x02AF), (0x0363, 0x036F), (0x1ABF, 0x1AC0), (0x1ACC, 0x1ACE),
+    (0x1D00, 0x1D25), (0x1D62, 0x1D65), (0x1D6B, 0x1D77), (0x1D79, 0x1D9A),
+    (0x1DCA, 0x1DCA), (0x1DD3, 0x1DF4), (0x1E00, 0x1EFF), (0x2071, 0x2071),
+    (0x207F, 0x207F), (0x2090, 0x209C), (0x2184, 0x2184), (0x249C, 0x24E9),
+    (0x271D, 0x271F), (0x2C2E, 0x2C2E), (0x2C5E, 0x2C5E), (0x2C60, 0x2C7C),
+    (0x2C7E, 0x2C7F), (0xA722, 0xA76F), (0xA771, 0xA787), (0xA78B, 0xA7CA),
+    (0xA7D0, 0xA7D1), (0xA7D3, 0xA7D3), (0xA7D5, 0xA7D9), (0xA7F5, 0xA7F7),
+    (0xA7FA, 0xA7FF), (0xAB30, 0xAB5A), (0xAB60, 0xAB64), (0xAB66, 0xAB68),
+    (0xFB00, 0xFB06), (0xFF21, 0xFF3A), (0xFF41, 0xFF5A), (0x1DF00, 0x1DF1E),
+    (0x1F110, 0x1F12C), (0x1F130, 0x1F149), (0x1F150, 0x1F169),
+    (0x1F170, 0x1F18A), (0x1F1A5, 0x1F1A5), (0x1F520, 0x1F521),
+    (0x1F524, 0x1F524), (0x1F546, 0x1F547), (0xE0041, 0xE005A),
+    (0xE0061, 0xE007A)
+)
+LATIN_RANGE_STARTS = tuple([begin for begin, end in LATIN_RANGES])
+
 
 def find_number_in_string(string):
     is_number = [char.isdigit() for char in string]
@@ -55,14 +75,21 @@ def is_dash_character(string):
 
 
 def is_latin_char(char):
-    return is_latin_char.cache.setdefault(char, 'LATIN' in ud.name(char))
-is_latin_char.cache = {}  # noqa: E305
+    code_point = ord(char)
+    if code_point < 0x80:
+        return char.isalpha()
+    index = bisect_right(LATIN_RANGE_STARTS, code_point) - 1
+    return index >= 0 and code_point <= LATIN_RANGES[index][1]
 
 
 def is_mostly_latin_string(string):
     if len(string) == 0:
         return False
-    latin_length = len([char for char in string if is_latin_char(char)])
+    if string.isascii():
+        # The only Latin characters in ASCII are the letters
+        latin_length = sum(map(str.isalpha, string))
+    else:
+        latin_length = len([char for char in string if is_latin_char(char)])
     return latin_length / len(string) >= 0.5
 
 
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, absolute_import
+
+import re
+
+from anitopy.anitopy import get_config, parse
+from anitopy.batch import parse_many
+from anitopy.config import ParserConfig
+from anitopy.element import ElementCategory
+from anitopy.result import ParseResult, get_layout
+
+SEPARATOR_PATTERN = re.compile('[/\\\\]')
+
+# Elements a directory name can provide for the files below it
+CONTEXT_CATEGORIES = (
+    ElementCategory.ANIME_TITLE,
+    ElementCategory.ANIME_SEASON,
+    ElementCategory.SOURCE,
+    ElementCategory.VIDEO_RESOLUTION,
+)
+
+
+def parse_path(path, options=None):
+    """Parse the last component of `path`, using the directories above it
+    as context. Use a PathParser to parse many paths."""
+    return PathParser(options).parse(path)
+
+
+class PathParser:
+    """Parses file paths, merging the context of their directories.
+
+    Paths are split on both kinds of slashes, and every directory above the
+    file is parsed once and cached, so parsing the files of a folder costs
+    one directory parse. Pass paths relative to the library root, or the
+    names of the directories above it are used as context too.
+
+    File name templates (see `parse_many`) are kept between calls too, so
+    parsing a folder in several batches costs no more than in one.
+
+    Directory elements fill in what the file name does not have. The
+    nearest directory with a title ends the context, e.g. for
+    "Title/Season 2/01.mkv" the season comes from "Season 2" and the title
+    from "Title". The directory title also replaces the file title when
+    the file title is unlikely to be right (see `is_file_title_trusted`).
+    """
+
+    def __init__(self, options=None):
+        self.config = get_config(options)
+        directory_options = self.config.get_options()
+        directory_options['parse_file_extension'] = False
+        self.directory_config = ParserConfig(directory_options)
+        self._contexts = {}
+        self._templates = {}
+
+    def parse(self, path):
+        return self.parse_many([path])[0]
+
+    def parse_many(self, paths, intern_table=None):
+        directories = []
+        filenames = []
+        for path in paths:
+            components = SEPARATOR_PATTERN.split(path)
+            directories.append(tuple([c for c in components[:-1] if c]))
+            filenames.append(components[-1])
+
+        results = parse_many(filenames, self.config, intern_table,
+                             self._templates)
+        return [merge_context(result, self.get_context(directory))
+                for result, directory in zip(results, directories)]
+
+    def get_context(self, directory):
+        """Return the context of a directory, a tuple of path components,
+        as a dict of elements keyed by category and the confidence of the
+        title in it."""
+        if not directory:
+            return {}, None
+        context = self._contexts.get(directory)
+        if context is None:
+            fields = {}
+            title_confidence = None
+            result = parse(directory[-1], self.directory_config)
+            if result is not None:
+                for category in CONTEXT_CATEGORIES:
+                    value = result.get_field(category)
+                    if value is not None:
+                        fields[category] = value
+                title_confidence = result.title_confidence
+                if is_type_title(result):
+                    del fields[ElementCategory.ANIME_TITLE]
+            if ElementCategory.ANIME_TITLE not in fields:
+                parent_fields, title_confidence = \
+                    self.get_context(directory[:-1])
+                for category, value in parent_fields.items():
+                    fields.setdefault(category, value)
+            context = self._contexts.setdefault(
+                directory, (fields, title_confidence))
+        return context
+
+
+def is_type_title(result):
+    # Names like "Specials" or "NCOP1" are parsed as a type and a title
+    anime_type = result.get_first(ElementCategory.ANIME_TYPE)
+    return anime_type is not None and result.title is not None and \
+        anime_type.lower() == result.title.lower()
+
+
+def is_file_title_trusted(result):
+    # Short episode file names ("01 - Episode Title.mkv",
+    # "S02E01 - Episode Title.mkv") have their episode title parsed as the
+    # anime title, which then starts with a number or follows the episode
+    title = result.title
+    if title is None or title[0].isdigit() or is_type_title(result):
+        return False
+    filename = result.file_name
+    title_index = filename.find(title)
+    for episode in result.episode_numbers:
+        if 0 <= filename.find(episode) < title_index:
+            return False
+    return True
+
+
+def merge_context(result, context):
+    fields, title_confidence = context
+    if not fields or result is None:
+        return result
+
+    merged = dict(result.fields())
+    title_info = result.title_info
+    title = fields.get(ElementCategory.ANIME_TITLE)
+    if title is not None and not is_file_title_trusted(result):
+        merged[ElementCategory.ANIME_TITLE] = title
+        # The title has no tokens in the file name
+        title_info = (title_confidence, None)
+    for category, value in fields.items():
+        merged.setdefault(category, value)
+    return ParseResult(get_layout(tuple(merged)), tuple(merged.values()),
+                       title_info)
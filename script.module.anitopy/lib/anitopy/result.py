@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from collections.abc import Mapping
+
+from anitopy.element import ElementCategory
+
+# Results with the same categories in the same order share their categories
+# tuple. The number of distinct layouts is small, the cap only guards
+# against unusual inputs.
+LAYOUT_CACHE_MAX = 1024
+_layouts = {}
+
+
+class ParseResult(Mapping):
+    """Result of parsing a filename.
+
+    Elements are stored as two tuples, categories and values, where a value
+    is either a string or a tuple of strings when a category was found more
+    than once. The common elements are available as attributes, and the
+    result can be read like the dict `parse` used to return, which is only
+    built by `to_dict`.
+
+    `title_confidence` (0 to 1, see the TITLE_CONFIDENCE constants of
+    anitopy.parser) tells how the title was found, and `title_span` is the
+    (first, last) index of its tokens. Both are None without a title.
+    """
+
+    __slots__ = ('_categories', '_values', '_title_info')
+
+    def __init__(self, categories, values, title_info=None):
+        self._categories = categories
+        self._values = values
+        self._title_info = title_info
+
+    @classmethod
+    def from_elements(cls, elements):
+        categories = []
+        values = []
+        for category, value in elements.items():
+            categories.append(category)
+            values.append(value[0] if len(value) == 1 else tuple(value))
+        return cls(get_layout(tuple(categories)), tuple(values),
+                   elements.get_title_info())
+
+    @property
+    def categories(self):
+        return self._categories
+
+    @property
+    def title_info(self):
+        return self._title_info
+
+    def fields(self):
+        """Return (category, value) pairs, with values as stored."""
+        return zip(self._categories, self._values)
+
+    def get_field(self, category):
+        for index, field_category in enumerate(self._categories):
+            if field_category is category:
+                return self._values[index]
+        return None
+
+    def get_first(self, category):
+        value = self.get_field(category)
+        return value[0] if isinstance(value, tuple) else value
+
+    def get_all(self, category):
+        value = self.get_field(category)
+        if value is None:
+            return ()
+        return value if isinstance(value, tuple) else (value,)
+
+    @property
+    def file_name(self):
+        return self.get_first(ElementCategory.FILE_NAME)
+
+    @property
+    def title(self):
+        return self.get_first(ElementCategory.ANIME_TITLE)
+
+    @property
+    def title_confidence(self):
+        return None if self._title_info is None else self._title_info[0]
+
+    @property
+    def title_span(self):
+        return None if self._title_info is None else self._title_info[1]
+
+    @property
+    def episode_numbers(self):
+        return self.get_all(ElementCategory.EPISODE_NUMBER)
+
+    @property
+    def seasons(self):
+        return self.get_all(ElementCategory.ANIME_SEASON)
+
+    @property
+    def resolution(self):
+        return self.get_first(ElementCategory.VIDEO_RESOLUTION)
+
+    @property
+    def checksum(self):
+        return self.get_first(ElementCategory.FILE_CHECKSUM)
+
+    def to_dict(self):
+        return dict([
+            (category.value, list(value) if isinstance(value, tuple)
+             else value)
+            for category, value in self.fields()
+        ])
+
+    def __getitem__(self, key):
+        try:
+            category = ElementCategory(key)
+        except ValueError:
+            raise KeyError(key)
+        value = self.get_field(category)
+        if value is None:
+            raise KeyError(key)
+        return list(value) if isinstance(value, tuple) else value
+
+    def __iter__(self):
+        return iter([category.value for category in self._categories])
+
+    def __len__(self):
+        return len(self._categories)
+
+    def __repr__(self):
+        return 'ParseResult({0!r})'.format(self.to_dict())
+
+
+def get_layout(categories):
+    layout = _layouts.get(categories)
+    if layout is None:
+        if len(_layouts) >= LAYOUT_CACHE_MAX:
+            return categories
+        layout = _layouts.setdefault(categories, categories)
+    return layout
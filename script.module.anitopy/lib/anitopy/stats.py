@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, absolute_import
+
+from time import perf_counter
+
+from anitopy.token import Tokens
+
+
+class ParseStats:
+    """Timings and counters of a single parse.
+
+    Pass an instance to `parse` to have it filled in, or pass a callback,
+    which is then called with a new instance and the parse result. Stage
+    times are in seconds, keyed by the name of the stage method.
+    """
+
+    __slots__ = ('filename', 'stage_times', 'total_time', 'token_count',
+                 'neighbour_searches')
+
+    def __init__(self):
+        self.filename = None
+        self.stage_times = {}
+        self.total_time = 0.0
+        self.token_count = 0
+        self.neighbour_searches = 0
+
+    def run(self, stage, function):
+        start = perf_counter()
+        try:
+            return function()
+        finally:
+            self.stage_times[stage] = \
+                self.stage_times.get(stage, 0.0) + perf_counter() - start
+
+    def __repr__(self):
+        return ('ParseStats(filename={0!r}, total_time={1!r}, '
+                'stage_times={2!r}, token_count={3!r}, '
+                'neighbour_searches={4!r})').format(
+            self.filename, self.total_time, self.stage_times,
+            self.token_count, self.neighbour_searches)
+
+
+class CountingTokens(Tokens):
+    """Tokens that count the neighbour searches made on them. Only used
+    when stats are collected, so that normal parses do not pay for it."""
+
+    def __init__(self, stats):
+        super(CountingTokens, self).__init__()
+        self.stats = stats
+
+    def find_previous(self, token, flags):
+        self.stats.neighbour_searches += 1
+        return super(CountingTokens, self).find_previous(token, flags)
+
+    def find_next(self, token, flags):
+        self.stats.neighbour_searches += 1
+        return super(CountingTokens, self).find_next(token, flags)
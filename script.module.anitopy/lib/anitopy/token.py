@@ -99,6 +99,9 @@ class Tokens:
     def empty(self):
         return len(self._tokens) == 0
 
+    def size(self):
+        return len(self._tokens)
+
     def append(self, token):
         self._tokens.append(token)
 
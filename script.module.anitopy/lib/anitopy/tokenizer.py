@@ -2,36 +2,44 @@
 
 from __future__ import unicode_literals, absolute_import
 
-import re
-
 from anitopy.keyword import keyword_manager
-from anitopy.token import TokenCategory, TokenFlags, Token
+from anitopy.token import TokenCategory, Token
+
+BRACKETS = (
+    ('(', ')'),  # U+0028-U+0029 Parenthesis
+    ('[', ']'),  # U+005B-U+005D Square bracket
+    ('{', '}'),  # U+007B-U+007D Curly bracket
+    ('\u300C', '\u300D'),  # Corner bracket
+    ('\u300E', '\u300F'),  # White corner bracket
+    ('\u3010', '\u3011'),  # Black lenticular bracket
+    ('\uFF08', '\uFF09'),  # Fullwidth parenthesis
+)
 
 
 class Tokenizer:
-    def __init__(self, filename, options, elements, tokens):
+    def __init__(self, filename, config, elements, tokens, stats=None):
         self.filename = filename
-        self.options = options
+        self.config = config
         self.elements = elements
         self.tokens = tokens
+        self.stats = stats
+        # [begin, end, stable] index ranges of the tokens added by each
+        # _tokenize_by_delimiters call
+        self._segments = []
 
     def tokenize(self):
-        self._tokenize_by_brackets()
+        if self.stats is None:
+            self._tokenize_by_brackets()
+        else:
+            self.stats.run('_tokenize_by_brackets', self._tokenize_by_brackets)
+            self.stats.token_count = self.tokens.size()
         return not self.tokens.empty()
 
     def _add_token(self, category, content, enclosed):
         self.tokens.append(Token(category, content, enclosed))
 
     def _tokenize_by_brackets(self):
-        brackets = [
-            ('(', ')'),  # U+0028-U+0029 Parenthesis
-            ('[', ']'),  # U+005B-U+005D Square bracket
-            ('{', '}'),  # U+007B-U+007D Curly bracket
-            ('\u300C', '\u300D'),  # Corner bracket
-            ('\u300E', '\u300F'),  # White corner bracket
-            ('\u3010', '\u3011'),  # Black lenticular bracket
-            ('\uFF08', '\uFF09'),  # Fullwidth parenthesis
-        ]
+        brackets = BRACKETS
 
         text = self.filename
         is_bracket_open = False
@@ -88,27 +96,85 @@ class Tokenizer:
             self._tokenize_by_delimiters(text[last_token_end_pos:], enclosed)
 
     def _tokenize_by_delimiters(self, text, enclosed):
-        delimiters = ''.join(
-            ['\\' + d for d in self.options['allowed_delimiters']])
-        pattern = '([{0}])'.format(delimiters)
-        splited_text = re.split(pattern, text)
+        splited_text = self.config.split_by_delimiters(text)
 
+        segment_begin = self.tokens.size()
         for sub_text in splited_text:
             if sub_text:
-                if sub_text in self.options['allowed_delimiters']:
+                if sub_text in self.config.delimiter_set:
                     self._add_token(
                         TokenCategory.DELIMITER, sub_text, enclosed)
                 else:
                     self._add_token(TokenCategory.UNKNOWN, sub_text, enclosed)
+        if self.tokens.size() != segment_begin:
+            self._segments.append([segment_begin, self.tokens.size(), False])
 
         self._validate_delimiter_tokens()
 
     def _validate_delimiter_tokens(self):
-        def find_previous_valid_token(token):
-            return self.tokens.find_previous(token, TokenFlags.VALID)
-
-        def find_next_valid_token(token):
-            return self.tokens.find_next(token, TokenFlags.VALID)
+        # Segments are always separated by bracket or identifier tokens, so
+        # validating one never affects another. Validating a segment again is
+        # a no-op once a pass leaves it unchanged, and such segments are
+        # skipped. The exception is a delimiter at the very beginning, whose
+        # previous token wraps around to the end of the list.
+        tokens = self.tokens.get_list()
+        first_validated = None
+
+        for segment in self._segments:
+            begin, end, stable = segment
+            if stable:
+                continue
+            if first_validated is None:
+                first_validated = begin
+            changed, wrapped = self._validate_delimiter_segment(
+                tokens, begin, end)
+            segment[2] = not changed and not wrapped
+            if wrapped:
+                for other_segment in self._segments:
+                    other_segment[2] = False
+
+        if first_validated is None:
+            return
+
+        # Remove the invalidated tokens and shift the segment ranges
+        valid_tokens = tokens[:first_validated]
+        removed = 0
+        segment_iter = iter(self._segments)
+        segment = next(segment_iter)
+        for index in range(first_validated, len(tokens)):
+            while segment is not None and index >= segment[1]:
+                segment[1] -= removed
+                segment = next(segment_iter, None)
+            if segment is not None and index == segment[0]:
+                segment[0] -= removed
+            if tokens[index].category == TokenCategory.INVALID:
+                removed += 1
+            else:
+                valid_tokens.append(tokens[index])
+        if segment is not None:
+            segment[1] -= removed
+        self.tokens.update(valid_tokens)
+
+    @staticmethod
+    def _validate_delimiter_segment(tokens, begin, end):
+        state = {'changed': False, 'wrapped': False}
+
+        def find_previous_valid_token(index):
+            # Same as Tokens.find_previous, which wraps around to the end of
+            # the list for the first token
+            if index == 0:
+                state['wrapped'] = True
+            start = index - 1 if index > 0 else len(tokens) - 1
+            for i in range(start, -1, -1):
+                if tokens[i].category != TokenCategory.INVALID:
+                    return tokens[i]
+            return None
+
+        def find_next_valid_token(index):
+            for i in range(index + 1, len(tokens)):
+                if tokens[i].category != TokenCategory.INVALID:
+                    return i, tokens[i]
+            return None, None
 
         def is_delimiter_token(token):
             return token is not None and \
@@ -125,58 +191,71 @@ class Tokenizer:
         def append_token_to(token, append_to):
             append_to.content += token.content
             token.category = TokenCategory.INVALID
+            state['changed'] = True
+
+        # Tokens behind the current one are never invalidated, so the previous
+        # valid token only has to be searched for at the beginning
+        prev_token = find_previous_valid_token(begin) if begin > 0 else None
 
-        for token in self.tokens.get_list():
+        for index in range(begin, end):
+            token = tokens[index]
             if token.category != TokenCategory.DELIMITER:
+                if token.category != TokenCategory.INVALID:
+                    prev_token = token
                 continue
 
             delimiter = token.content
-            prev_token = find_previous_valid_token(token)
-            next_token = find_next_valid_token(token)
+            previous_token = prev_token if index > 0 else \
+                find_previous_valid_token(index)
+            next_index, next_token = find_next_valid_token(index)
 
             # Check for single-character tokens to prevent splitting group
             # names, keywords, episode number, etc.
             if delimiter != ' ' and delimiter != '_':
-                if is_single_character_token(prev_token):
-                    append_token_to(token, prev_token)
+                if is_single_character_token(previous_token):
+                    append_token_to(token, previous_token)
                     while is_unknown_token(next_token):
-                        append_token_to(next_token, prev_token)
-                        next_token = find_next_valid_token(next_token)
+                        append_token_to(next_token, previous_token)
+                        next_index, next_token = \
+                            find_next_valid_token(next_index)
                         if is_delimiter_token(next_token) and \
                                 next_token.content == delimiter:
-                            append_token_to(next_token, prev_token)
-                            next_token = find_next_valid_token(next_token)
+                            append_token_to(next_token, previous_token)
+                            next_index, next_token = \
+                                find_next_valid_token(next_index)
                     continue
                 if is_single_character_token(next_token):
-                    append_token_to(token, prev_token)
-                    append_token_to(next_token, prev_token)
+                    append_token_to(token, previous_token)
+                    append_token_to(next_token, previous_token)
                     continue
 
             # Check for adjacent delimiters
-            if is_unknown_token(prev_token) and is_delimiter_token(next_token):
+            if is_unknown_token(previous_token) and \
+                    is_delimiter_token(next_token):
                 next_delimiter = next_token.content
                 if delimiter != next_delimiter and delimiter != ',':
                     if next_delimiter == ' ' or next_delimiter == '_':
-                        append_token_to(token, prev_token)
+                        append_token_to(token, previous_token)
 
-            elif is_delimiter_token(prev_token) and \
+            elif is_delimiter_token(previous_token) and \
                     is_delimiter_token(next_token):
-                prev_delimiter = prev_token.content
+                prev_delimiter = previous_token.content
                 next_delimiter = next_token.content
                 if prev_delimiter == next_delimiter and \
                         prev_delimiter != delimiter:
                     token.category = TokenCategory.UNKNOWN  # e.g. "&" in "_&_"
+                    state['changed'] = True
 
             # Check for other special cases
             if delimiter == '&' or delimiter == '+':
-                if is_unknown_token(prev_token) and \
+                if is_unknown_token(previous_token) and \
                         is_unknown_token(next_token):
-                    if prev_token.content.isdigit() and \
+                    if previous_token.content.isdigit() and \
                             next_token.content.isdigit():
-                        append_token_to(token, prev_token)
-                        append_token_to(next_token, prev_token)  # e.g. "01+02"
+                        append_token_to(token, previous_token)
+                        append_token_to(next_token, previous_token)  # e.g. "01+02"
+
+            if token.category != TokenCategory.INVALID:
+                prev_token = token
 
-        self.tokens.update([
-            token for token in self.tokens.get_list()
-            if token.category != TokenCategory.INVALID
-        ])
+        return state['changed'], state['wrapped']
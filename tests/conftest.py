@@ -0,0 +1,30 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'script.module.anitopy', 'lib'))
+sys.path.insert(0, os.path.join(ROOT, 'metadata.aniscraper'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import runpy
+
+import pytest
+
+MAIN = os.path.join(ROOT, 'metadata.aniscraper', 'main.py')
+
+
+@pytest.fixture
+def kodi(tmp_path, monkeypatch):
+    """Kodi stand-ins with their special:// folders in tmp_path"""
+    pytest.importorskip('requests')
+    from kodi_shim import Kodi
+    kodi = Kodi(str(tmp_path))
+    kodi.install(monkeypatch)
+    return kodi
+
+
+@pytest.fixture
+def scraper(kodi, monkeypatch):
+    """The globals of main.py, run for an action that does nothing"""
+    monkeypatch.setattr(sys, 'argv', ['plugin://metadata.aniscraper/', '1', '?action=none'])
+    return runpy.run_path(MAIN)
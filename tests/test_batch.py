@@ -0,0 +1,33 @@
+import pytest
+
+import anitopy
+from bench_parse_many import build_folders
+from common import load_corpus
+
+# Filenames that only differ in the number of their ordinal, found by
+# fuzzing. Only valid ordinals ("2nd", not "6nd") are season numbers.
+ORDINAL_GROUPS = [
+    ['Kimi no Na wa 2nd Season - 15', 'Kimi no Na wa 6nd Season - 07'],
+    ['Kimi no Na wa 3rd Season - 15', 'Kimi no Na wa 5rd Season - 07'],
+    ['Title 4th Season 15.mkv', 'Title 2th Season 07.mkv'],
+    ['[Grp] Kimi no Na wa - 4th Season - 15 [1080p].mkv',
+     '[Grp] Kimi no Na wa - 1th Season - 07 [1080p].mkv'],
+    ['Title 3rd Season - 12', 'Title 1rd Season - 15'],
+]
+
+
+def assert_same_as_parse(filenames):
+    for filename, result in zip(filenames, anitopy.parse_many(filenames)):
+        expected = anitopy.parse(filename)
+        assert dict(result) == dict(expected), filename
+        assert result.title_info == expected.title_info, filename
+
+
+@pytest.mark.parametrize('filenames', ORDINAL_GROUPS)
+def test_ordinals_match_parse(filenames):
+    assert_same_as_parse(filenames)
+
+
+def test_corpus_folders_match_parse():
+    for folder in build_folders(load_corpus(), 5):
+        assert_same_as_parse(folder)
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+from anitopy.element import ElementCategory
+from anitopy.keyword import KeywordManager, KeywordOption
+
+from conftest import ROOT
+
+# Run in a new interpreter, so the keyword tables are not loaded yet
+ADD_BEFORE_PARSE = '''
+import anitopy
+from anitopy.element import ElementCategory
+from anitopy.keyword import KeywordOption, keyword_manager
+keyword_manager.add(ElementCategory.RELEASE_INFORMATION, KeywordOption(), ['NEWREL'])
+result = anitopy.parse('[Group] Title - 01 [NEWREL][720p].mkv')
+print(result['release_information'], result['video_resolution'], result.title)
+'''
+
+
+def test_add_before_first_parse():
+    output = subprocess.run(
+        [sys.executable, '-c', ADD_BEFORE_PARSE], check=True, capture_output=True, text=True,
+        cwd=ROOT, env=dict(os.environ, PYTHONPATH=os.path.join(ROOT, 'script.module.anitopy', 'lib')))
+    assert output.stdout.split() == ['NEWREL', '720p', 'Title']
+
+
+def test_add_keeps_default_keywords():
+    manager = KeywordManager()
+    manager.add(ElementCategory.FILE_EXTENSION, KeywordOption(), ['NEWEXT'])
+    assert manager.find('NEWEXT', ElementCategory.FILE_EXTENSION).category == \
+        ElementCategory.FILE_EXTENSION
+    assert manager.find('MKV', ElementCategory.FILE_EXTENSION) is not None
+    assert manager.find('BD').category == ElementCategory.SOURCE
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import runpy
+import functools
+
+import pytest
+
+import breaker
+import deadline
+import httpcache
+import queries
+from bench_actions import make_anime
+from replay_trace import write_sources
+
+requests = pytest.importorskip('requests')
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'metadata.aniscraper', 'main.py')
+QUERY = 'query ($id: Int) { Media (id: $id, type: ANIME) { id } }'
+
+
+def made_up_anime(anime_id, title):
+    return make_anime(anime_id, title, 12)
+
+
+class Response:
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps({'data': data})
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error', response=self)
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    """Answer every AniList request with the same anime, and count them"""
+    sent = []
+
+    def post(url, json=None, timeout=None):
+        sent.append(json)
+        variables = json['variables']
+        return Response({'Media': made_up_anime(variables.get('id', 1), variables.get('search', 'Anime'))})
+    monkeypatch.setattr(requests, 'post', post)
+    return sent
+
+
+def make_main(scraper, tmp_path, seconds=20, clock=None, circuit=None, cache=None):
+    clock = clock or deadline.FakeClock()
+    circuit = circuit or breaker.CircuitBreaker(str(tmp_path / 'breaker.json'), 3, 60)
+    cache = cache or httpcache.ResponseCache(str(tmp_path / 'responses'), 60, 1 << 20)
+    return scraper['Main'](deadline.Deadline(seconds, clock=clock), circuit, cache)
+
+
+def test_deadline_during_half_open_probe(scraper, tmp_path, posts):
+    wall = deadline.FakeClock(1000)
+    circuit = breaker.CircuitBreaker(str(tmp_path / 'breaker.json'), 3, 60, clock=wall)
+    for _ in range(3):
+        circuit.record_failure()
+    wall.advance(61)
+
+    clock = deadline.FakeClock()
+    main = make_main(scraper, tmp_path, 5, clock, circuit)
+    clock.advance(6)
+    with pytest.raises(deadline.DeadlineExceeded):
+        main._AL_post(QUERY, {'id': 1})
+    # The probe was not used up, the next process can send it right away
+    assert circuit.load()['state'] == breaker.OPEN
+    assert posts == []
+
+    main = make_main(scraper, tmp_path, circuit=circuit)
+    assert main._AL_post(QUERY, {'id': 1})['Media']['id'] == 1
+    assert circuit.load()['state'] == breaker.CLOSED
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """The clock of the deadlines main.py makes"""
+    clock = deadline.FakeClock()
+    monkeypatch.setattr(deadline, 'Deadline', functools.partial(deadline.Deadline, clock=clock))
+    return clock
+
+
+def run_action(monkeypatch, **params):
+    monkeypatch.setattr(sys, 'argv', ['plugin://metadata.aniscraper/', '1',
+                                      '?' + '&'.join(f'{k}={v}' for k, v in params.items())])
+    return runpy.run_path(MAIN)
+
+
+def test_find_stops_scanning_at_deadline(kodi, clock, tmp_path, posts, monkeypatch):
+    library = str(tmp_path / 'library')
+    for disc, title, count in (('Disc 1', 'Title', 2), ('Disc 2', 'Other', 6)):
+        os.makedirs(os.path.join(library, 'Show', disc))
+        for number in range(1, count + 1):
+            open(os.path.join(library, 'Show', disc, f'[Group] {title} - {number:02}.mkv'), 'w').close()
+    write_sources(kodi, library)
+
+    # Every folder listed takes 6 of the 20 seconds
+    xbmcvfs = sys.modules['xbmcvfs']
+    listdir = xbmcvfs.listdir
+
+    def slow_listdir(path):
+        clock.advance(6)
+        dirs, files = listdir(path)
+        return sorted(dirs), files
+    monkeypatch.setattr(xbmcvfs, 'listdir', slow_listdir)
+
+    run_action(monkeypatch, action='find', title='Show')
+    assert any('Out of time, not scanning' in message and 'Disc 2' in message for message in kodi.log)
+    # Other has the most files, but only the candidates scanned in time are looked up
+    assert [sent['variables'] for sent in posts] == [{'search': 'Title'}]
+    assert [url for url, _, _ in kodi.directory_items] == [str(made_up_anime(1, 'Title')['id'])]
+
+
+def test_details_out_of_time_use_expired_response(kodi, clock, posts, monkeypatch):
+    profile = kodi.translate_path('special://profile/addon_data/metadata.aniscraper')
+    key = httpcache.response_key(queries.media_query('id', ('identity', 'listing', 'details', 'artwork')),
+                                 {'id': 7})
+    # Stored long before the TTL
+    old_cache = httpcache.ResponseCache(os.path.join(profile, 'responses'), 60, 1 << 20, clock=lambda: 0)
+    old_cache.put(key, {'Media': made_up_anime(7, 'Title')})
+
+    # Loading the database takes the whole budget
+    xbmcvfs = sys.modules['xbmcvfs']
+    exists = xbmcvfs.exists
+    monkeypatch.setattr(xbmcvfs, 'exists', lambda path: clock.advance(60) or exists(path))
+
+    run_action(monkeypatch, action='getdetails', url='7')
+    assert posts == []
+    assert any('using an expired cached response' in message for message in kodi.log)
+    succeeded, item = kodi.resolved
+    assert succeeded and item.label == 'Title'
+
+
+def test_refresh_skips_response_cache(scraper, tmp_path, posts):
+    max_age = scraper['CACHE_MAX_AGE']
+    now = time.time()
+    # A response cache that keeps responses for longer than anime are kept
+    cache = httpcache.ResponseCache(str(tmp_path / 'responses'), 3 * max_age, 1 << 20,
+                                    clock=lambda: now - 2 * max_age)
+    query = queries.media_query('id', ('identity', 'listing'))
+    cache.put(httpcache.response_key(query, {'id': 7}), {'Media': made_up_anime(7, 'Old title')})
+    cache.clock = time.time
+    main = make_main(scraper, tmp_path, cache=cache)
+
+    # Anime looked up from the cache are as old as their response, so they are refreshed
+    anime = main.fetch_anime_by_id('7', ('identity', 'listing'))
+    assert anime['title']['english'] == 'Old title'
+    assert posts == []
+    assert main._db['anime']['fetched'][7] == now - 2 * max_age
+    assert main.is_stale(anime)
+
+    main.fetch_anime_by_id('7', ('identity', 'listing'))
+    assert main._refresh_queue == [('id', 7)]
+    main.run_refreshes()
+    assert [sent['variables'] for sent in posts] == [{'id': 7}]
+    assert main._db['anime']['ids'][7]['title']['english'] == 'Anime'
+    assert not main.is_stale(anime)
+    # The refreshed response is still cached
+    assert cache.entry(httpcache.response_key(query, {'id': 7}))[0] > now - 2 * max_age
+
+
+def test_unreadable_jar_starts_empty(scraper, tmp_path, posts):
+    with open(scraper['__picklejar__'], 'wb') as fs:
+        fs.write(b'\x80\x05half a pickle')
+    main = make_main(scraper, tmp_path)
+    assert main.fetch_anime_by_id('7', ('identity',))['id'] == 7
+
+
+def test_refresh_keeps_writes_of_the_next_call(scraper, tmp_path, posts):
+    fragments = ('identity', 'listing')
+    main = make_main(scraper, tmp_path)
+    main.fetch_anime_by_id('7', fragments)
+    main._db['anime']['fetched'][7] = 0
+    main.fetch_anime_by_id('7', fragments)
+    assert main._refresh_queue == [('id', 7)]
+
+    # The next call saves anime 8 while this one refreshes in the background
+    make_main(scraper, tmp_path).fetch_anime_by_id('8', fragments)
+    main.run_refreshes()
+    jar = make_main(scraper, tmp_path)._db
+    assert sorted(jar['anime']['ids']) == [7, 8]
+    assert not main.is_stale(jar['anime']['ids'][7])
+
+
+@pytest.mark.parametrize('limit', ['5', '6', '20'])
+def test_find_scans_at_any_time_limit(kodi, clock, tmp_path, posts, monkeypatch, limit):
+    library = str(tmp_path / 'library')
+    os.makedirs(os.path.join(library, 'Show'))
+    for number in range(1, 13):
+        open(os.path.join(library, 'Show', f'[Group] Show - {number:02}.mkv'), 'w').close()
+    write_sources(kodi, library)
+    kodi.settings['action_time_limit'] = limit
+
+    run_action(monkeypatch, action='find', title='Show')
+    assert [sent['variables'] for sent in posts] == [{'search': 'Show'}]
+    assert len(kodi.directory_items) == 1
+
+
+def test_server_error_uses_expired_response(scraper, tmp_path, monkeypatch):
+    error = Response(None, 500)
+    error.text = json.dumps({'errors': [{'message': 'Internal Server Error', 'status': 500}], 'data': None})
+    monkeypatch.setattr(requests, 'post', lambda url, json=None, timeout=None: error)
+    cache = httpcache.ResponseCache(str(tmp_path / 'responses'), 60, 1 << 20, clock=lambda: 0)
+    query = queries.media_query('id', ('identity',))
+    cache.put(httpcache.response_key(query, {'id': 7}), {'Media': made_up_anime(7, 'Title')})
+    cache.clock = time.time
+    main = make_main(scraper, tmp_path, cache=cache)
+
+    anime, fetched = main.AL_get_anime_by_id(7, ('identity',))
+    assert anime['id'] == 7 and fetched == 0
+    assert main.breaker.load()['failures'] == 1
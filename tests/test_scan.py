@@ -0,0 +1,42 @@
+import os
+import sys
+
+import anitopy
+
+
+def make_show(library, folder, files):
+    os.makedirs(os.path.join(library, folder))
+    for file in files:
+        open(os.path.join(library, folder, file), 'w').close()
+
+
+def test_show_folder_is_context(scraper, tmp_path, monkeypatch):
+    library = str(tmp_path / 'library')
+    make_show(library, 'Title Season 2 [BD 1080p]', [f'{number:02}.mkv' for number in range(1, 13)])
+
+    parsed = []
+    parse_many = anitopy.PathParser.parse_many
+
+    def spy(self, paths, intern_table=None):
+        results = parse_many(self, paths, intern_table)
+        parsed.extend(results)
+        return results
+    monkeypatch.setattr(anitopy.PathParser, 'parse_many', spy)
+
+    candidates = scraper['main'].scan_anime(library, 'Title Season 2 [BD 1080p]')
+    assert list(candidates) == ['Title']
+    assert len(candidates['Title']) == 12
+    assert len(parsed) == 12
+    for result in parsed:
+        assert result.title == 'Title'
+        assert result['anime_season'] == '2'
+
+
+def test_kodi_stand_ins_are_removed(scraper):
+    assert sys.modules['xbmc'] is scraper['xbmc']
+
+
+def test_kodi_stand_ins_were_removed():
+    # Runs after the test above, whose stand-ins must not leak into later tests
+    assert 'xbmc' not in sys.modules
+    assert not sys.argv[-1].startswith('?action=')
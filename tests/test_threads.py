@@ -0,0 +1,46 @@
+import sys
+import random
+import threading
+
+import anitopy
+from common import load_corpus
+
+THREADS = 4
+ROUNDS = 2
+
+
+def test_threads_match_serial_parse():
+    """Parse the corpus from several threads at once, to check that anitopy is reentrant"""
+    filenames = load_corpus()
+    configs = [None, anitopy.ParserConfig({'title_only': True})]
+    expected = {(index, filename): anitopy.parse(filename, config)
+                for index, config in enumerate(configs) for filename in filenames}
+
+    mismatches = []
+    start = threading.Barrier(THREADS)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        start.wait()
+        for _ in range(ROUNDS):
+            order = list(filenames)
+            rng.shuffle(order)
+            index = rng.randrange(len(configs))
+            results = anitopy.parse_many(order, configs[index]) if rng.random() < 0.5 \
+                else [anitopy.parse(filename, configs[index]) for filename in order]
+            for filename, result in zip(order, results):
+                if result != expected[(index, filename)]:
+                    mismatches.append(filename)
+
+    # Switch threads often to make interleaving within a parse likely
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert mismatches == []
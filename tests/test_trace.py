@@ -0,0 +1,39 @@
+import os
+
+import actiontrace
+
+
+def write(path, text):
+    with open(path, 'w') as fs:
+        fs.write(text)
+
+
+def read(path):
+    with open(path) as fs:
+        return fs.read()
+
+
+def test_snapshot_when_trace_starts(tmp_path):
+    trace_path = str(tmp_path / 'trace.jsonl')
+    db_path = str(tmp_path / 'db.bin')
+    responses = tmp_path / 'responses'
+    responses.mkdir()
+    write(db_path, 'before')
+    write(str(responses / 'entry.json.z'), 'response')
+
+    actiontrace.snapshot(trace_path, [db_path, str(responses), str(tmp_path / 'missing')])
+    snapshot = actiontrace.snapshot_path(trace_path)
+    assert sorted(os.listdir(snapshot)) == ['db.bin', 'responses']
+    assert read(os.path.join(snapshot, 'responses', 'entry.json.z')) == 'response'
+
+    # Later calls append to the trace and keep the snapshot of its start
+    actiontrace.Trace(trace_path).write('find', {'title': 'Show'})
+    write(db_path, 'after')
+    actiontrace.snapshot(trace_path, [db_path, str(responses)])
+    assert read(os.path.join(snapshot, 'db.bin')) == 'before'
+
+    # A new trace gets a new snapshot
+    os.remove(trace_path)
+    actiontrace.snapshot(trace_path, [db_path])
+    assert os.listdir(snapshot) == ['db.bin']
+    assert read(os.path.join(snapshot, 'db.bin')) == 'after'